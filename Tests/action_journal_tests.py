@@ -0,0 +1,114 @@
+import os
+import multiprocessing
+import pytest
+from datetime import datetime, timedelta
+
+from action_journal import ActionJournal, open_journal
+
+START = datetime(2025, 3, 1)
+
+def _record(i, threat_type=None, target=None):
+    return {
+        "timestamp": (START + timedelta(minutes=i)).isoformat(),
+        "threat_type": threat_type or ("sql injection" if i % 2 else "ddos"),
+        "target": target or f"10.0.0.{i % 3}",
+        "action": f"action {i}"
+    }
+
+def _try_open(directory, result):
+    try:
+        ActionJournal(directory).close()
+        result.put("opened")
+    except RuntimeError:
+        result.put("locked")
+
+# Test that queries combine field filters with a time range, oldest first
+def test_query_by_field_and_time(tmp_path):
+    journal = ActionJournal(str(tmp_path), flush_every=4)
+    for i in range(12):
+        journal.append(_record(i))
+
+    assert [r["action"] for r in journal.query(threat_type="ddos", target="10.0.0.0")] == ["action 0", "action 6"]
+    window = journal.query(since=START + timedelta(minutes=3), until=START + timedelta(minutes=7), threat_type="sql injection")
+    assert [r["action"] for r in window] == ["action 3", "action 5"]
+    assert [r["action"] for r in journal.query(since=START + timedelta(minutes=10))] == ["action 10", "action 11"]
+    assert [r["action"] for r in journal.query(limit=2, target="10.0.0.1")] == ["action 7", "action 10"]
+    assert journal.query(target="192.168.1.1") == []
+    assert [r["action"] for r in journal.recent(2)] == ["action 10", "action 11"]
+    assert journal.query(limit=0) == [] and journal.recent(0) == []
+    with pytest.raises(ValueError):
+        journal.query(action="action 1")
+    journal.close()
+
+# Test that full segments roll over and the oldest are dropped along with their index entries
+def test_segment_rollover_and_drop(tmp_path):
+    journal = ActionJournal(str(tmp_path), segment_max_bytes=300, max_segments=2, flush_every=1)
+    for i in range(10):
+        journal.append(_record(i))
+    journal.flush()
+
+    # Each record is 113 bytes, so every 300 byte segment holds two
+    segments = sorted(name for name in os.listdir(tmp_path) if name.startswith("segment-"))
+    assert segments == ["segment-000004.jsonl", "segment-000005.jsonl"]
+    assert [r["action"] for r in journal.query()] == ["action 6", "action 7", "action 8", "action 9"]
+    assert [r["action"] for r in journal.query(threat_type="ddos")] == ["action 6", "action 8"]
+    assert journal.query(target="10.0.0.2", until=START + timedelta(minutes=6)) == []
+    journal.close()
+
+# Test that indexes are rebuilt from disk on restart and a torn final record is discarded
+def test_replay_after_restart(tmp_path):
+    journal = ActionJournal(str(tmp_path), segment_max_bytes=400)
+    for i in range(8):
+        journal.append(_record(i))
+    journal.close()
+
+    last = sorted(name for name in os.listdir(tmp_path) if name.startswith("segment-"))[-1]
+    with open(tmp_path / last, "ab") as f:
+        f.write(b'{"timestamp": "2025-03-01T00:09:00", "acti')  # Crash halfway through a write
+
+    journal = ActionJournal(str(tmp_path), segment_max_bytes=400)
+    assert [r["action"] for r in journal.query(threat_type="sql injection")] == ["action 1", "action 3", "action 5", "action 7"]
+    assert len(journal.recent()) == 8
+    journal.append(_record(8))
+    assert [r["action"] for r in journal.query(since=START + timedelta(minutes=7))] == ["action 7", "action 8"]
+    journal.close()
+
+# Test that a process shares one journal per directory and other processes are locked out
+def test_single_writer(tmp_path):
+    journal = open_journal(str(tmp_path))
+    assert open_journal(str(tmp_path / ".." / tmp_path.name)) is journal
+    with pytest.raises(RuntimeError, match="open_journal"):
+        ActionJournal(str(tmp_path))
+
+    result = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_try_open, args=(str(tmp_path), result))
+    process.start()
+    process.join(30)
+    assert result.get(timeout=5) == "locked"
+
+    journal.close()
+    journal.append(_record(0))  # Still held by the second opener
+    journal.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        journal.append(_record(1))
+    reopened = open_journal(str(tmp_path))
+    assert reopened is not journal and len(reopened.recent()) == 1
+    reopened.close()
+
+# Test that several mitigation instances in one process write to the same journal
+def test_instances_share_journal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "mitigation.json").write_text('{"remediation_journal_dir": "history"}')
+    from threat_mitigation import ThreatMitigation
+
+    first = ThreatMitigation("mitigation.json")
+    second = ThreatMitigation("mitigation.json")
+    first.automated_response("DDoS Attack", {"ip": "10.0.0.1"})
+    second.automated_response("DDoS Attack", {"ip": "10.0.0.2"})
+    first.close()
+    assert [r["target"] for r in second.find_remediations(threat_type="DDoS Attack")] == ["10.0.0.1", "10.0.0.2"]
+    second.close()
+
+# Run tests
+if __name__ == "__main__":
+    pytest.main([__file__])
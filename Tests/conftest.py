@@ -0,0 +1,11 @@
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Make api/ and src/ modules importable by bare name, as the scripts themselves do.
+# Appended, not prepended: src/logging.py would otherwise shadow the standard library.
+for directory in ("api", "src"):
+    path = os.path.join(ROOT, directory)
+    if path not in sys.path:
+        sys.path.append(path)
@@ -0,0 +1,83 @@
+import pytest
+
+from correlation_engine import (
+    CorrelationEngine, asset_key, observe_shodan, BREACHED_ACCOUNT, OPEN_PORT, RISKY_PORT, SUBDOMAIN
+)
+
+BASE = 1_700_000_000.0
+HOUR = 3600
+
+# Test that indicators of the same asset resolve to it, directly or through a link
+def test_asset_key_and_links():
+    assert asset_key("Admin@Shop.Example.com") == "example.com"
+    assert asset_key("api.eu.example.com.") == "example.com"
+    assert asset_key("203.0.113.7") == "203.0.113.7"
+
+    engine = CorrelationEngine()
+    engine.link("203.0.113.7", "example.com")
+    assert engine.resolve("203.0.113.7") == "example.com"
+
+# Test that observations from different sources join into a composite finding
+def test_sources_join_on_asset():
+    engine = CorrelationEngine()
+    shodan = {"hostnames": ["www.example.com"], "ports": [443, 3306]}
+    assert observe_shodan(engine, "203.0.113.7", shodan, timestamp=BASE) == []
+    assert engine.resolve("203.0.113.7") == "example.com", "IP should be linked through its hostname"
+
+    findings = engine.observe("hibp", BREACHED_ACCOUNT, "admin@example.com", detail="Adobe", timestamp=BASE + HOUR)
+    assert [f["threat_name"] for f in findings] == ["Exposed Admin Service with Breached Credentials"]
+    assert findings[0]["asset"] == "example.com"
+    assert findings[0]["evidence"][RISKY_PORT] == [{"source": "shodan", "ioc": "203.0.113.7", "detail": 3306}]
+
+    findings = engine.observe("securitytrails", SUBDOMAIN, "api.example.com", timestamp=BASE + 2 * HOUR)
+    assert sorted(f["threat_name"] for f in findings) == [
+        "Compromised Accounts on Expanding Attack Surface", "Subdomain Sprawl with Exposed Services"
+    ]
+
+    assert engine.observe("hibp", BREACHED_ACCOUNT, "admin@other.com", timestamp=BASE + 2 * HOUR) == []
+
+# Test that a finding is emitted once per window, and again once the window has passed
+def test_dedup_within_window():
+    engine = CorrelationEngine(window=48 * HOUR)
+    engine.observe("shodan", OPEN_PORT, "www.example.com", detail=80, timestamp=BASE)
+    assert len(engine.observe("securitytrails", SUBDOMAIN, "a.example.com", timestamp=BASE + HOUR)) == 1
+    assert engine.observe("securitytrails", SUBDOMAIN, "b.example.com", timestamp=BASE + 2 * HOUR) == []
+    assert engine.observe("shodan", OPEN_PORT, "www.example.com", detail=22, timestamp=BASE + 47 * HOUR) == []
+
+    # Both kinds still seen within the window, and the previous emission has aged out
+    findings = engine.observe("shodan", OPEN_PORT, "www.example.com", detail=22, timestamp=BASE + 50 * HOUR)
+    assert [f["threat_name"] for f in findings] == ["Subdomain Sprawl with Exposed Services"]
+    assert engine.stats()["findings"] == 2
+
+# Test that observations outside the window do not join
+def test_expired_observations_do_not_join():
+    engine = CorrelationEngine(window=HOUR)
+    engine.observe("shodan", RISKY_PORT, "db.example.com", detail=5432, timestamp=BASE)
+    assert engine.observe("hibp", BREACHED_ACCOUNT, "dba@example.com", timestamp=BASE + 2 * HOUR) == []
+    assert list(engine.assets["example.com"]["events"][RISKY_PORT]) == []
+
+# Test that idle and surplus assets, IOC links and per-kind events are bounded
+def test_eviction():
+    engine = CorrelationEngine(window=HOUR, max_assets=2, max_iocs=2, max_events_per_kind=3)
+    engine.observe("hibp", BREACHED_ACCOUNT, "a@one.com", timestamp=BASE)
+    engine.observe("hibp", BREACHED_ACCOUNT, "a@two.com", timestamp=BASE + 60)
+    engine.observe("hibp", BREACHED_ACCOUNT, "a@three.com", timestamp=BASE + 120)
+    assert list(engine.assets) == ["two.com", "three.com"], "Least recently seen asset should go first"
+
+    engine.observe("hibp", BREACHED_ACCOUNT, "a@four.com", timestamp=BASE + 2 * HOUR)
+    assert list(engine.assets) == ["four.com"], "Assets idle for longer than the window should go"
+
+    for i in range(5):
+        engine.observe("securitytrails", SUBDOMAIN, f"s{i}.four.com", timestamp=BASE + 2 * HOUR + i)
+    assert [event[2] for event in engine.assets["four.com"]["events"][SUBDOMAIN]] == [
+        "s2.four.com", "s3.four.com", "s4.four.com"
+    ]
+
+    for ip in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+        engine.link(ip, "four.com")
+    assert list(engine.iocs) == ["10.0.0.2", "10.0.0.3"]
+    assert engine.stats()["assets"] == 1 and engine.stats()["iocs"] == 2
+
+# Run tests
+if __name__ == "__main__":
+    pytest.main([__file__])
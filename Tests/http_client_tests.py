@@ -0,0 +1,126 @@
+import io
+import pytest
+import requests
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import http_client
+from http_client import CircuitBreaker, CircuitOpenError, HttpClient, _retry_after
+
+URL = "https://api.example.test/v1/host"
+
+def _response(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response.raw = io.BytesIO(b"")
+    return response
+
+class ScriptedSession:
+    """Plays back a fixed list of responses/exceptions in place of the network."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(http_client.time, "sleep", delays.append)
+    return delays
+
+def _client(outcomes, retries=3):
+    client = HttpClient(max_retries=retries)
+    client.session = ScriptedSession(outcomes)
+    return client
+
+# Test that the breaker opens, lets a single trial through, and closes or reopens on its outcome
+def test_circuit_breaker():
+    breaker = CircuitBreaker("shodan", failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow(), "Only one trial request while half open"
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+    slow = CircuitBreaker("hibp", failure_threshold=1, reset_timeout=60)
+    slow.record_failure()
+    assert not slow.allow(), "Circuit should stay open until the reset timeout passes"
+
+# Test Retry-After parsing for delta-seconds, HTTP dates and malformed values
+def test_retry_after():
+    assert _retry_after(_response(429, {"Retry-After": "7"})) == 7.0
+    assert _retry_after(_response(429, {"Retry-After": "-3"})) == 0.0
+    future = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=120), usegmt=True)
+    assert 115 <= _retry_after(_response(503, {"Retry-After": future})) <= 120
+    past = format_datetime(datetime.now(timezone.utc) - timedelta(hours=1), usegmt=True)
+    assert _retry_after(_response(503, {"Retry-After": past})) == 0.0
+    assert _retry_after(_response(503, {"Retry-After": "soon"})) is None
+    assert _retry_after(_response(503)) is None
+
+# Test that 5xx responses are retried, honouring Retry-After, until one succeeds
+def test_retries_until_success(sleeps):
+    client = _client([_response(503, {"Retry-After": "2"}), _response(502), _response(200)])
+    response = client.get(URL)
+    assert response.status_code == 200
+    assert client.session.calls == 3
+    assert sleeps[0] == 2.0 and len(sleeps) == 2
+
+    stats = client.stats()["hosts"]["api.example.test"]
+    assert stats["requests"] == 3 and stats["failures"] == 2 and stats["retries"] == 2
+
+# Test that the last error response is returned and network errors re-raised once retries run out
+def test_retries_exhausted(sleeps):
+    client = _client([_response(429), _response(429)], retries=1)
+    assert client.get(URL).status_code == 429
+
+    client = _client([requests.exceptions.ConnectionError()] * 3, retries=2)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get(URL)
+    assert client.session.calls == 3
+
+# Test that a non-transient error is raised at once and still resolves a half-open trial
+def test_other_request_errors_resolve_trial(sleeps):
+    client = _client([requests.exceptions.ChunkedEncodingError(), _response(200)])
+    breaker = client.breaker("api.example.test")
+    breaker.state, breaker.opened_at, breaker.reset_timeout = "open", 0.0, 0
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client.get(URL)
+    assert client.session.calls == 1 and not sleeps
+    assert breaker.state == "open", "Failed trial should reopen the circuit"
+
+    assert client.get(URL).status_code == 200
+    assert breaker.state == "closed"
+
+# Test that an open circuit fails fast without touching the network
+def test_open_circuit_fails_fast(sleeps):
+    client = _client([requests.exceptions.Timeout()] * 5, retries=10)
+    client.breakers["shodan"] = CircuitBreaker("shodan", failure_threshold=2)
+    with pytest.raises(requests.exceptions.Timeout):
+        client.get(URL, provider="shodan")
+    assert client.session.calls == 2, "Retries should stop once the circuit opens"
+
+    with pytest.raises(CircuitOpenError):
+        client.get(URL, provider="shodan")
+    assert client.session.calls == 2
+    assert client.stats()["circuits"] == {"shodan": "open"}
+
+# Run tests
+if __name__ == "__main__":
+    pytest.main([__file__])
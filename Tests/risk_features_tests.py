@@ -0,0 +1,85 @@
+import pytest
+
+from risk_features import extract_features, score_features, risk_band
+
+SHODAN = {
+    "ports": [22, 80],
+    "data": [
+        {"port": 3306, "product": "MySQL", "version": "5.7"},
+        {"port": 21, "product": "vsftpd", "version": "2.3.4", "vulns": ["CVE-2011-2523"]}
+    ]
+}
+VIRUSTOTAL = {"data": {"attributes": {"last_analysis_stats": {"malicious": 7, "suspicious": 1, "harmless": 62}}}}
+LEAKLOOKUP = {"error": "false", "message": {"adobe.com": [], "linkedin.com": []}}
+
+# Test that the three payloads are reduced to the expected features
+def test_extract_features():
+    features = extract_features(SHODAN, VIRUSTOTAL, LEAKLOOKUP)
+    assert features["open_ports"] == [21, 22, 80, 3306]
+    assert features["risky_ports"] == ["21/ftp", "3306/mysql"]
+    assert features["known_bad_services"] == ["vsftpd 2.3.4"]
+    assert features["vulns"] == ["CVE-2011-2523"]
+    assert features["vt_engines"] == 70 and features["detection_ratio"] == 0.1
+    assert features["breach_sources"] == ["adobe.com", "linkedin.com"]
+    assert features["sources_present"] == ["shodan", "virustotal", "leaklookup"]
+
+# Test that a LeakLookup reply without "message" is not counted as a breach
+def test_leaklookup_without_message_has_no_breaches():
+    features = extract_features(None, None, {"success": True})
+    assert features["breach_count"] == 0
+    assert features["breach_sources"] == []
+
+# Test that error payloads are treated as missing sources, and no data at all has no confidence
+def test_error_payloads_are_absent_sources():
+    features = extract_features({"error": "No information available"}, {}, {"error": "true", "message": "bad key"})
+    assert features["sources_present"] == []
+    result = score_features(features)
+    assert result["insufficient_data"] is True
+    assert result["confidence"] == 0.0 and result["band"] == "unknown"
+
+# Test that a VirusTotal payload whose "data" is a list is ignored rather than crashing
+def test_virustotal_list_payload():
+    features = extract_features(None, {"data": [{"id": "8.8.8.8", "type": "ip_address"}]}, None)
+    assert features["vt_engines"] == 0 and "virustotal" not in features["sources_present"]
+    v2 = extract_features(None, {"positives": 3, "total": 60}, None)
+    assert v2["vt_malicious"] == 3 and v2["detection_ratio"] == 0.05
+
+# Test scoring, bands and how confidence falls near a band edge and with missing sources
+def test_score_features():
+    result = score_features(extract_features(SHODAN, VIRUSTOTAL, LEAKLOOKUP))
+    assert result["risk_score"] == 82 and result["band"] == "high"
+    assert result["confidence"] == 0.8 and result["insufficient_data"] is False
+
+    near_edge = score_features(extract_features({"ports": [80, 3306, 5432]}, None, None))
+    assert near_edge["risk_score"] == 22 and near_edge["band"] == "low"
+    assert near_edge["confidence"] < 0.6
+
+    assert [risk_band(score) for score in (0, 29, 30, 69, 70)] == ["low", "low", "medium", "medium", "high"]
+
+# Test that only cases below the confidence threshold are sent to the LLM
+def test_escalation_threshold(monkeypatch):
+    pytest.importorskip("openai")
+    import gpt_risk
+
+    calls = []
+    def fake_llm(features, local=None):
+        calls.append(features)
+        return {"risk_score": 50, "explanation": "LLM estimate."}
+    monkeypatch.setattr(gpt_risk, "analyze_risk_llm", fake_llm)
+
+    confident = gpt_risk.analyze_risk(SHODAN, VIRUSTOTAL, LEAKLOOKUP)
+    assert confident["source"] == "local" and not calls
+
+    ambiguous = gpt_risk.analyze_risk({"ports": [80, 3306, 5432]}, None, None)
+    assert ambiguous["source"] == "llm" and len(calls) == 1
+
+    gpt_risk.analyze_risk({"ports": [80, 3306, 5432]}, None, None, confidence_threshold=0.0)
+    assert len(calls) == 1, "A zero threshold should never escalate"
+
+    outage = gpt_risk.analyze_risk({"error": "timeout"}, None, {"error": "true"})
+    assert outage["insufficient_data"] is True and outage["risk_score"] is None
+    assert len(calls) == 1, "A provider outage is reported, not scored as low risk"
+
+# Run tests
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,154 @@
+import time
+import multiprocessing
+import pytest
+
+from shard_coordinator import HashRing, ShardCoordinator, sqlite_connect
+
+TARGETS = [f"10.0.{i // 256}.{i % 256}" for i in range(60)]
+FAST = {"heartbeat_ttl": 1, "lease_ttl": 1, "max_scan_time": 0.5}  # Short TTLs so tests can wait them out
+
+def _worker(db_path, worker_id, barrier, out_path):
+    coordinator = ShardCoordinator(TARGETS, worker_id=worker_id, connect=sqlite_connect(db_path))
+    coordinator.join()
+    barrier.wait()  # Every worker registered before anybody sweeps
+    coordinator.refresh_membership()
+    scanned = coordinator.run_sweep(lambda target: True)
+    with open(out_path, "w") as f:
+        f.write("\n".join(scanned))
+    barrier.wait()  # Keep heartbeats alive until everyone finished
+    coordinator.close()
+
+# Test that consistent hashing only moves the departed worker's targets
+def test_hash_ring_minimal_movement():
+    before = HashRing(["w1", "w2", "w3"])
+    after = HashRing(["w1", "w2"])
+    for target in TARGETS:
+        if before.get(target) != "w3":
+            assert after.get(target) == before.get(target), "Target moved between surviving workers"
+
+# Test that several processes partition the target list without overlap
+def test_workers_partition_targets(tmp_path):
+    db_path = str(tmp_path / "leases.db")
+    barrier = multiprocessing.Barrier(3)
+    workers = []
+    for i in range(3):
+        out_path = str(tmp_path / f"worker{i}.txt")
+        process = multiprocessing.Process(target=_worker, args=(db_path, f"worker{i}", barrier, out_path))
+        process.start()
+        workers.append((process, out_path))
+
+    results = []
+    for process, out_path in workers:
+        process.join(60)
+        assert process.exitcode == 0, "Worker process failed"
+        with open(out_path) as f:
+            results.append([line for line in f.read().splitlines() if line])
+
+    scanned = [target for result in results for target in result]
+    assert sorted(scanned) == sorted(TARGETS), "Every target should be scanned exactly once"
+    assert all(results), "Every worker should receive a shard"
+
+# Test that a crashed worker's shard is reclaimed after its heartbeat expires
+def test_crashed_worker_shard_reclaimed(tmp_path):
+    connect = sqlite_connect(str(tmp_path / "leases.db"))
+    crashed = ShardCoordinator(TARGETS, worker_id="crashed", connect=connect, **FAST)
+    survivor = ShardCoordinator(TARGETS, worker_id="survivor", connect=connect, **FAST)
+    crashed.join()
+    survivor.join()
+    crashed.refresh_membership()
+
+    crashed_shard = crashed.owned_targets()
+    for target in crashed_shard:
+        assert crashed.claim(target)[0]
+    assert survivor.claim(crashed_shard[0])[0] is False, "Live lease should block other workers"
+
+    crashed.stop_heartbeat()
+    time.sleep(1.5)  # "crashed" stops heartbeating and its leases run out
+    scanned = survivor.run_sweep(lambda target: True)
+    assert sorted(scanned) == sorted(TARGETS), "Survivor should take over the whole target list"
+
+    progress = {worker["worker_id"]: worker for worker in survivor.progress()}
+    assert progress["survivor"]["targets_done"] == len(TARGETS)
+    assert progress["crashed"]["alive"] is False
+
+def _sweep_pair(tmp_path, **ttls):
+    connect = sqlite_connect(str(tmp_path / "leases.db"))
+    a = ShardCoordinator(TARGETS, worker_id="a", connect=connect, **ttls)
+    b = ShardCoordinator(TARGETS, worker_id="b", connect=connect, **ttls)
+    a.join()
+    b.join()
+    a.refresh_membership()
+    a_scanned = a.run_sweep(lambda target: True)
+    b_scanned = b.run_sweep(lambda target: True)
+    assert a_scanned and b_scanned, "Both workers should own part of the target list"
+    return a, b, b_scanned
+
+# Test that a graceful leave keeps scan history, so the rebalance sweep does not rescan
+def test_no_rescan_after_leave(tmp_path):
+    a, b, _ = _sweep_pair(tmp_path)
+    b.leave()
+    assert a.heartbeat(), "Leaving worker should trigger a rebalance"
+    assert a.run_sweep(lambda target: True, max_age=6 * 3600) == [], "Recently scanned targets were rescanned"
+    assert sorted(a.owned_targets()) == sorted(TARGETS)
+
+# Test that a crash keeps scan history, while overdue targets are still picked up
+def test_no_rescan_after_crash(tmp_path):
+    a, b, b_scanned = _sweep_pair(tmp_path, **FAST)
+    a_done = len(TARGETS) - len(b_scanned)
+    b.stop_heartbeat()
+    time.sleep(1.5)  # "b" stops heartbeating
+    assert a.run_sweep(lambda target: True, max_age=6 * 3600, rebalance=True) == [], "Recently scanned targets were rescanned"
+    rescanned = a.run_sweep(lambda target: True, max_age=0, rebalance=True)
+    assert sorted(rescanned) == sorted(TARGETS), "Overdue targets must be rescanned"
+
+    # Rebalance sweeps are counted apart from the periodic sweep's progress
+    progress = {worker["worker_id"]: worker for worker in a.progress()}["a"]
+    assert progress["sweep"] == 1 and progress["targets_done"] == progress["targets_owned"] == a_done
+    assert progress["rebalances"] == 2 and progress["rebalance_done"] == len(TARGETS)
+
+# Test that a scan longer than the heartbeat TTL neither looks like a crash nor loses its lease
+def test_slow_scan_keeps_worker_and_lease(tmp_path):
+    connect = sqlite_connect(str(tmp_path / "leases.db"))
+    a = ShardCoordinator(TARGETS, worker_id="a", connect=connect, heartbeat_ttl=1, lease_ttl=5, max_scan_time=0.5)
+    b = ShardCoordinator(TARGETS, worker_id="b", connect=connect, heartbeat_ttl=1, lease_ttl=5, max_scan_time=0.5)
+    a.join()
+    b.join()
+    target = a.owned_targets()[0]
+    assert a.claim(target)[0]
+
+    time.sleep(1.5)  # "a" is busy scanning and does not call heartbeat() itself
+    assert not b.heartbeat(), "Background heartbeat should keep a slow worker in the ring"
+    assert b.claim(target)[0] is False
+
+    a.stop_heartbeat()  # Now "a" really dies, but its lease has not run out yet
+    time.sleep(1.5)
+    assert b.heartbeat() and b.ring.get(target) == "b"
+    assert b.claim(target)[0] is False, "Unexpired lease must not be reclaimed"
+    time.sleep(2.5)
+    assert b.claim(target)[0], "Expired lease should be reclaimed"
+
+# Test that long-dead workers are pruned from the registry
+def test_dead_workers_pruned(tmp_path):
+    connect = sqlite_connect(str(tmp_path / "leases.db"))
+    a = ShardCoordinator(TARGETS, worker_id="a", connect=connect, **FAST)
+    a.join()
+    now = time.time()
+    a._execute(
+        "INSERT INTO scan_workers (worker_id, started_at, heartbeat_at) VALUES (%s, %s, %s), (%s, %s, %s)",
+        ("host-1", now - 100, now - 100, "host-2", now - 5, now - 5)
+    )
+    a.conn.commit()
+    a.refresh_membership()
+    workers = {worker["worker_id"]: worker["alive"] for worker in a.progress()}
+    assert workers == {"a": True, "host-2": False}, "Only workers dead for over WORKER_RETENTION TTLs are dropped"
+    a.close()
+
+# Test that TTLs shorter than the worst-case scan time are rejected
+def test_ttls_must_exceed_scan_time(tmp_path):
+    connect = sqlite_connect(str(tmp_path / "leases.db"))
+    with pytest.raises(ValueError):
+        ShardCoordinator(TARGETS, connect=connect, heartbeat_ttl=30, lease_ttl=120)
+
+# Run tests
+if __name__ == "__main__":
+    pytest.main([__file__])
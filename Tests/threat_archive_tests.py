@@ -0,0 +1,59 @@
+import json
+import pytest
+from datetime import datetime
+
+from threat_archive import ThreatArchive
+
+ROWS = [
+    # Out of order within the second day, to exercise the unsorted partition path
+    {"timestamp": datetime(2025, 3, 1, 10), "source": "tva_mapping", "asset_id": 1, "ip": "10.0.0.1",
+     "threat": "SQL Injection", "detail": "login form", "likelihood": 4, "impact": 5, "risk_score": 20},
+    {"timestamp": datetime(2025, 3, 1, 12), "source": "tva_mapping", "asset_id": 2, "ip": "10.0.0.2",
+     "threat": "Phishing", "detail": None, "likelihood": 3, "impact": 3, "risk_score": 9},
+    {"timestamp": datetime(2025, 3, 2, 18), "source": "threat_data", "asset_id": None, "ip": "10.0.0.3",
+     "threat": "SQL Injection", "detail": "search API", "likelihood": 5, "impact": 5, "risk_score": 25},
+    {"timestamp": datetime(2025, 3, 2, 9), "source": "threat_data", "asset_id": 1, "ip": "10.0.0.1",
+     "threat": "DDoS", "detail": "login form", "likelihood": 2, "impact": 4, "risk_score": 8}
+]
+
+# Test that appended rows come back unchanged through scan, group_by and to_dataframe
+def test_round_trip(tmp_path):
+    archive = ThreatArchive(str(tmp_path / "archive"))
+    assert archive.append_rows(ROWS) == len(ROWS)
+    assert archive.partitions() == sorted(archive.partitions()) and len(archive.partitions()) == 2
+
+    parts = list(archive.scan(datetime(2025, 3, 1, 11), datetime(2025, 3, 2, 12), ["threat", "risk_score"]))
+    scanned = [(archive.decode([t])[0], int(r)) for part in parts for t, r in zip(part["threat"], part["risk_score"])]
+    assert sorted(scanned) == [("DDoS", 8), ("Phishing", 9)]
+    assert archive.count() == 4 and archive.count(end=datetime(2025, 3, 2)) == 2
+
+    groups = archive.group_by("threat")
+    assert groups["SQL Injection"] == {"count": 2, "sum": 45, "max": 25, "mean": 22.5}
+    assert groups["Phishing"]["count"] == 1 and groups["DDoS"]["max"] == 8
+
+    # A fresh instance reads the same data back from disk, dictionary included
+    df = ThreatArchive(str(tmp_path / "archive")).to_dataframe()
+    assert len(df) == 4
+    assert sorted(df["risk_score"].tolist()) == [8, 9, 20, 25]
+    assert sorted(df["asset_id"].tolist()) == [-1, 1, 1, 2]
+
+# Test that AIThreatHunting only touches the archive in load_history and returns readable columns
+def test_load_history_decodes_columns(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # The module writes its log file to the working directory
+    from ai_threat_hunting import AIThreatHunting
+
+    archive_path = tmp_path / "archive"
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({"archive_path": str(archive_path)}))
+    hunter = AIThreatHunting(str(config_file))
+    assert not archive_path.exists(), "Archive should not be created at construction"
+
+    ThreatArchive(str(archive_path)).append_rows(ROWS)
+    df = hunter.load_history(datetime(2025, 3, 1), datetime(2025, 3, 2))
+    assert df["threat"].tolist() == ["SQL Injection", "Phishing"]
+    assert df["detail"][0] == "login form" and df["detail"].isna()[1]
+    assert df["timestamp"].tolist() == [datetime(2025, 3, 1, 10), datetime(2025, 3, 1, 12)]
+
+# Run tests
+if __name__ == "__main__":
+    pytest.main([__file__])
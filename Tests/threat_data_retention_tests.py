@@ -0,0 +1,132 @@
+import pytest
+from datetime import datetime
+
+import threat_data_retention
+from threat_data_retention import (
+    PARTITION_NAME, _period_start, ensure_partitions, expired_partitions, list_partitions, partition_period
+)
+
+class CatalogConnection:
+    """
+    Answers the pg_inherits lookup in list_partitions with a fixed list of partition
+    names, reports DEFAULT rows for the given range starts and fails to create `broken`.
+    """
+
+    def __init__(self, names, default_rows=(), broken=()):
+        self.names = names
+        self.default_rows = set(default_rows)
+        self.broken = set(broken)
+        self.executed = []
+        self.rollbacks = 0
+        self.rowcount = 0
+        self._exists = False
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params=None):
+        query = " ".join(query.split())
+        if query.startswith("SELECT EXISTS"):
+            self._exists = params[0] in self.default_rows
+        if any(f"CREATE TABLE {name} " in query for name in self.broken):
+            raise RuntimeError("partition constraint for default partition would be violated")
+        self.executed.append(query)
+
+    def fetchone(self):
+        return (self._exists,)
+
+    def fetchall(self):
+        return [(name,) for name in self.names]
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        pass
+
+    def ddl(self):
+        return [query.split(" PARTITION OF")[0].split(" FOR VALUES")[0] for query in self.executed
+                if query.startswith(("CREATE", "ALTER", "WITH"))]
+
+# Test that periods start at midnight, and weeks on Monday
+def test_period_start():
+    moment = datetime(2025, 3, 6, 15, 30)  # A Thursday
+    assert _period_start(moment, "day") == datetime(2025, 3, 6)
+    assert _period_start(moment, "week") == datetime(2025, 3, 3)
+    assert _period_start(datetime(2025, 3, 3), "week") == datetime(2025, 3, 3)
+
+# Test that only partitions created by the retention job are recognised
+def test_partition_name_parsing():
+    match = PARTITION_NAME.match("threat_data_p20250301")
+    assert match.group("table") == "threat_data" and match.group("start") == "20250301"
+    assert partition_period("threat_data_p20250301") == "day"
+    assert partition_period("bench_part_w20250303") == "week"
+    for name in ("threat_data_default", "threat_data_p2025031", "threat_data_x20250301"):
+        assert partition_period(name) is None
+
+    conn = CatalogConnection(["threat_data_p20250302", "threat_data_default", "threat_data_p20250301"])
+    assert list_partitions(conn) == [
+        ("threat_data_p20250301", datetime(2025, 3, 1), datetime(2025, 3, 2)),
+        ("threat_data_p20250302", datetime(2025, 3, 2), datetime(2025, 3, 3))
+    ]
+
+# Test that a partition expires only once its whole range is past the retention window
+def test_expiry_cutoff():
+    partitions = [
+        ("threat_data_p20250101", datetime(2025, 1, 1), datetime(2025, 1, 2)),
+        ("threat_data_p20250102", datetime(2025, 1, 2), datetime(2025, 1, 3)),
+        ("threat_data_w20250106", datetime(2025, 1, 6), datetime(2025, 1, 13))
+    ]
+    now = datetime(2025, 4, 2)  # 90 days after 2025-01-02
+    assert expired_partitions(partitions, 90, now) == ["threat_data_p20250101"]
+    assert expired_partitions(partitions, 90, datetime(2025, 4, 1, 23, 59)) == []
+    assert expired_partitions(partitions, 79, now) == [name for name, _, _ in partitions]
+
+# Test that a period that does not match the existing partitions is rejected
+def test_mismatched_period_rejected():
+    conn = CatalogConnection(["threat_data_p20250301"])
+    with pytest.raises(ValueError, match="partitioned by day"):
+        ensure_partitions(conn, period="week", now=datetime(2025, 3, 6))
+    assert not any("CREATE TABLE" in query for query in conn.executed)
+
+# Test that partitions are created ahead, and periods missed while the job was down are backfilled
+def test_ensure_partitions_backfills_gap():
+    conn = CatalogConnection(["threat_data_p20250301"])
+    created = ensure_partitions(conn, ahead=2, now=datetime(2025, 3, 4, 12))
+    assert created == ["threat_data_p20250302", "threat_data_p20250303", "threat_data_p20250304",
+                       "threat_data_p20250305", "threat_data_p20250306"]
+
+# Test that rows already in DEFAULT are moved into a new partition instead of blocking it
+def test_default_rows_moved_into_new_partition():
+    conn = CatalogConnection([], default_rows=[datetime(2025, 3, 5)])
+    assert ensure_partitions(conn, ahead=1, now=datetime(2025, 3, 4)) == ["threat_data_p20250304", "threat_data_p20250305"]
+    assert conn.ddl() == [
+        "CREATE TABLE threat_data_p20250304",
+        "ALTER TABLE threat_data DETACH PARTITION threat_data_default",
+        "CREATE TABLE threat_data_p20250305",
+        "WITH moved AS ( DELETE FROM threat_data_default WHERE created_at >= %s AND created_at < %s RETURNING * ) "
+        "INSERT INTO threat_data_p20250305 SELECT * FROM moved",
+        "ALTER TABLE threat_data ATTACH PARTITION threat_data_default DEFAULT"
+    ]
+
+# Test that one failing partition does not stop the others (or the rest of maintenance)
+def test_partition_failure_isolated():
+    conn = CatalogConnection([], broken=["threat_data_p20250304"])
+    assert ensure_partitions(conn, ahead=1, now=datetime(2025, 3, 4)) == ["threat_data_p20250305"]
+    assert conn.rollbacks == 1
+
+# Test that the benchmark creates the watermark table before its cleanup deletes from it
+def test_benchmark_creates_watermarks_first(monkeypatch):
+    conn = CatalogConnection([])
+    monkeypatch.setattr(threat_data_retention, "postgres_connect", lambda: conn)
+    assert threat_data_retention.benchmark(sizes=()) == []
+    statements = [query.split(" (")[0] for query in conn.executed]
+    assert statements[0] == "CREATE TABLE IF NOT EXISTS rollup_watermarks"
+    assert "DELETE FROM rollup_watermarks WHERE rollup_table LIKE 'bench_part_%'" in statements
+
+# Run tests
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,5 +1,8 @@
 import requests
 import mysql.connector
+import src_path
+from http_client import get_client
+from correlation_engine import CorrelationEngine, observe_shodan, BREACHED_ACCOUNT, SUBDOMAIN
 import schedule
 import time
 from datetime import datetime
@@ -17,6 +20,17 @@ DB_CONFIG = {
     "database": "threat_intel"
 }
 
+# ✅ Monitored assets: domain -> tva asset id and the IPs/emails that belong to it
+MONITORED_ASSETS = {
+    "example.com": {"asset_id": 2, "ips": ["8.8.8.8"], "emails": ["example@email.com"]}  # Web Application
+}
+
+# ✅ Streaming correlation of Shodan/HIBP/SecurityTrails results per asset
+correlator = CorrelationEngine()
+for domain, asset in MONITORED_ASSETS.items():
+    for indicator in asset["ips"] + asset["emails"]:
+        correlator.link(indicator, domain)
+
 # ✅ Function to store threat data in MySQL
 def store_threat_data(asset_id, threat_name, vulnerability_description, likelihood, impact):
     try:
@@ -34,42 +48,72 @@ def store_threat_data(asset_id, threat_name, vulnerability_description, likeliho
     except Exception as e:
         print(f"❌ Database Error: {e}")
 
+# ✅ Function to look up the tva asset id of the monitored asset an IP, email or domain belongs to
+def monitored_asset_id(indicator):
+    return MONITORED_ASSETS.get(correlator.resolve(indicator), {}).get("asset_id")
+
+# ✅ Function to store composite findings from the correlation engine
+def store_findings(findings):
+    for finding in findings:
+        asset_id = MONITORED_ASSETS.get(finding["asset"], {}).get("asset_id")
+        store_threat_data(asset_id, finding["threat_name"], finding["description"],
+                          finding["likelihood"], finding["impact"])
+
 # ✅ Function to fetch data from Shodan API
 def fetch_shodan_data(ip):
     url = f"https://api.shodan.io/shodan/host/{ip}?key={SHODAN_API_KEY}"
-    response = requests.get(url).json()
+    try:
+        response = get_client().get(url, provider="shodan").json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"❌ Shodan request failed: {e}")
+        return
     if "error" not in response:
         ports = response.get('ports', [])
         threat_name = f"Open Ports: {ports}"
-        store_threat_data(1, threat_name, "Exposed services detected", 4, 5)
+        store_threat_data(monitored_asset_id(ip), threat_name, "Exposed services detected", 4, 5)
+        store_findings(observe_shodan(correlator, ip, response))
 
 # ✅ Function to fetch data from Have I Been Pwned API
 def fetch_hibp_data(email):
     url = f"https://haveibeenpwned.com/api/v3/breachedaccount/{email}"
     headers = {"hibp-api-key": HIBP_API_KEY}
-    response = requests.get(url, headers=headers)
+    try:
+        response = get_client().get(url, headers=headers, provider="hibp")
+    except requests.exceptions.RequestException as e:
+        print(f"❌ HIBP request failed: {e}")
+        return
     if response.status_code == 200:
         breaches = response.json()
         if breaches:
             for breach in breaches:
-                store_threat_data(2, breach['Name'], "Compromised account found", 5, 5)
+                store_threat_data(monitored_asset_id(email), breach['Name'], "Compromised account found", 5, 5)
+                store_findings(correlator.observe("hibp", BREACHED_ACCOUNT, email, detail=breach['Name']))
 
 # ✅ Function to fetch data from SecurityTrails API
 def fetch_securitytrails_data(domain):
     url = f"https://api.securitytrails.com/v1/domain/{domain}/subdomains"
     headers = {"APIKEY": SECURITYTRAILS_API_KEY}
-    response = requests.get(url, headers=headers).json()
+    try:
+        response = get_client().get(url, headers=headers, provider="securitytrails").json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"❌ SecurityTrails request failed: {e}")
+        return
     if "subdomains" in response:
         subdomains = response["subdomains"]
         threat_name = f"Subdomains Found: {len(subdomains)}"
-        store_threat_data(3, threat_name, "Potential attack surface detected", 3, 4)
+        store_threat_data(monitored_asset_id(domain), threat_name, "Potential attack surface detected", 3, 4)
+        for subdomain in subdomains:
+            store_findings(correlator.observe("securitytrails", SUBDOMAIN, f"{subdomain}.{domain}", asset=domain))
 
 # ✅ Function to automate the execution every 24 hours
 def update_threat_data():
     print("🔍 Fetching latest threat intelligence data...")
-    fetch_shodan_data("8.8.8.8")  # Example IP
-    fetch_hibp_data("example@email.com")  # Example Email
-    fetch_securitytrails_data("example.com")  # Example Domain
+    for domain, asset in MONITORED_ASSETS.items():
+        for ip in asset["ips"]:
+            fetch_shodan_data(ip)
+        for email in asset["emails"]:
+            fetch_hibp_data(email)
+        fetch_securitytrails_data(domain)
     print("✅ Threat intelligence data updated!")
 
 # ✅ Schedule the script to run every 24 hours
@@ -1,4 +1,5 @@
 from flask import Flask, jsonify
+import src_path
 from risk_analysis import calculate_risk
 
 app = Flask(__name__)
@@ -1,29 +1,81 @@
+import argparse
 import schedule
 import time
 from shodan_integration import fetch_shodan_data, store_threat_data
+from shard_coordinator import ShardCoordinator, sqlite_connect
 
 # List of IP addresses to monitor (you can add more IPs as needed)
 IP_ADDRESSES = ["8.8.8.8", "1.1.1.1", "192.168.1.1"]
 
+SWEEP_INTERVAL_HOURS = 6
+
+def scan_ip(ip):
+    """
+    Fetch OSINT threat data for a single IP address and store it in the database.
+    """
+    print(f"Fetching data for IP: {ip}")
+    shodan_data = fetch_shodan_data(ip)
+    if shodan_data:
+        store_threat_data(ip, shodan_data)
+        print(f"Data for IP {ip} stored successfully!")
+        return True
+    print(f"Failed to fetch data for IP {ip}")
+    return False
+
 def run_osint_updates():
     """
     Fetch OSINT threat data for all IP addresses and store it in the database.
     """
     for ip in IP_ADDRESSES:
-        print(f"Fetching data for IP: {ip}")
-        shodan_data = fetch_shodan_data(ip)
-        if shodan_data:
-            store_threat_data(ip, shodan_data)
-            print(f"Data for IP {ip} stored successfully!")
-        else:
-            print(f"Failed to fetch data for IP {ip}")
+        scan_ip(ip)
+
+def run_sharded_scheduler(coordinator):
+    """
+    Run as one of several workers: each sweep only scans this worker's shard,
+    and a rebalance (worker joined, left or crashed) immediately picks up any
+    targets that have not been scanned during the current interval.
+    """
+    interval = SWEEP_INTERVAL_HOURS * 3600
+
+    def sweep():
+        coordinator.run_sweep(scan_ip)
+        for worker in coordinator.progress():
+            print(f"[{worker['worker_id']}] alive={worker['alive']} sweep={worker['sweep']} "
+                  f"done={worker['targets_done']}/{worker['targets_owned']} failed={worker['targets_failed']} "
+                  f"rebalances={worker['rebalances']} (+{worker['rebalance_done']} scanned)")
 
-# Schedule the OSINT updates to run every 6 hours
-schedule.every(6).hours.do(run_osint_updates)
+    def heartbeat():
+        if coordinator.heartbeat():
+            coordinator.run_sweep(scan_ip, max_age=interval, rebalance=True)
+
+    coordinator.join()
+    schedule.every(SWEEP_INTERVAL_HOURS).hours.do(sweep)
+    schedule.every(max(1, coordinator.heartbeat_ttl // 3)).seconds.do(heartbeat)
+    sweep()
+    try:
+        while True:
+            schedule.run_pending()
+            time.sleep(1)
+    finally:
+        coordinator.leave()
+        coordinator.close()
 
 if __name__ == "__main__":
-    print("Starting OSINT threat intelligence auto-update scheduler...")
-    # Run the scheduler indefinitely
-    while True:
-        schedule.run_pending()
-        time.sleep(1)  # Sleep for 1 second to avoid high CPU usage
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="OSINT threat intelligence auto-update scheduler")
+    parser.add_argument("--sharded", action="store_true", help="Share the target list with other workers")
+    parser.add_argument("--worker-id", help="Unique worker name (defaults to hostname-pid)")
+    parser.add_argument("--sqlite", help="Use a local SQLite file for leases instead of PostgreSQL")
+    args = parser.parse_args()
+
+    if args.sharded:
+        print("Starting sharded OSINT scheduler worker...")
+        connect = sqlite_connect(args.sqlite) if args.sqlite else None
+        run_sharded_scheduler(ShardCoordinator(IP_ADDRESSES, worker_id=args.worker_id, connect=connect))
+    else:
+        # Schedule the OSINT updates to run every 6 hours
+        schedule.every(SWEEP_INTERVAL_HOURS).hours.do(run_osint_updates)
+        print("Starting OSINT threat intelligence auto-update scheduler...")
+        # Run the scheduler indefinitely
+        while True:
+            schedule.run_pending()
+            time.sleep(1)  # Sleep for 1 second to avoid high CPU usage
@@ -0,0 +1,396 @@
+"""
+Sharded Scan Coordinator
+Spreads the OSINT scan target list across several worker processes/hosts.
+Targets are assigned with consistent hashing over the set of live workers,
+and every scan is guarded by a lease row in the database so two workers never
+scan the same target at once and a crashed worker's targets are reclaimed.
+"""
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Database configuration (same PostgreSQL instance as shodan_integration.py)
+DB_CONFIG = {
+    "dbname": "threat_intel",
+    "user": "admin",
+    "password": "1234",
+    "host": "localhost",
+    "port": "5432"
+}
+
+# Worst case for one scan through the shared HTTP client: 4 attempts of up to
+# 3.05s connect + 15s read, plus up to 30s Retry-After between attempts
+MAX_SCAN_TIME = 180
+HEARTBEAT_TTL = 240     # Seconds without a heartbeat before a worker is considered dead
+LEASE_TTL = 300         # Seconds a claimed target stays locked to its worker
+VIRTUAL_NODES = 64      # Points per worker on the hash ring
+WORKER_RETENTION = 10   # Dead workers are forgotten after this many heartbeat TTLs
+
+# Portable DDL: runs unchanged on PostgreSQL and on SQLite (used for local testing)
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS scan_workers (
+        worker_id VARCHAR(255) PRIMARY KEY,
+        started_at DOUBLE PRECISION NOT NULL,
+        heartbeat_at DOUBLE PRECISION NOT NULL,
+        sweep INTEGER DEFAULT 0,
+        targets_owned INTEGER DEFAULT 0,
+        targets_done INTEGER DEFAULT 0,
+        targets_failed INTEGER DEFAULT 0,
+        rebalances INTEGER DEFAULT 0,
+        rebalance_done INTEGER DEFAULT 0,
+        rebalance_failed INTEGER DEFAULT 0,
+        total_scanned INTEGER DEFAULT 0,
+        last_target VARCHAR(255)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS scan_leases (
+        target VARCHAR(255) PRIMARY KEY,
+        worker_id VARCHAR(255),
+        lease_expires_at DOUBLE PRECISION,
+        last_scanned_at DOUBLE PRECISION
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_scan_leases_worker ON scan_leases(worker_id)"
+]
+
+
+def postgres_connect():
+    """Open a connection to the shared PostgreSQL database."""
+    import psycopg2
+    return psycopg2.connect(**DB_CONFIG)
+
+
+def sqlite_connect(path):
+    """Return a connection factory for a local SQLite stand-in database."""
+    def connect():
+        return sqlite3.connect(path, timeout=30)
+    return connect
+
+
+class HashRing:
+    """Consistent hash ring mapping scan targets to worker ids."""
+
+    def __init__(self, nodes=(), replicas=VIRTUAL_NODES):
+        self.replicas = replicas
+        self.nodes = set()
+        self._keys = []
+        self._owners = []
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value):
+        return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+    def add(self, node):
+        """Place a worker on the ring."""
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.replicas):
+            point = self._hash(f"{node}#{i}")
+            idx = bisect.bisect(self._keys, point)
+            self._keys.insert(idx, point)
+            self._owners.insert(idx, node)
+
+    def get(self, key):
+        """Return the worker responsible for a target, or None if the ring is empty."""
+        if not self._keys:
+            return None
+        idx = bisect.bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._owners[idx]
+
+
+class ShardCoordinator:
+    def __init__(self, targets, worker_id=None, connect=None,
+                 heartbeat_ttl=HEARTBEAT_TTL, lease_ttl=LEASE_TTL, max_scan_time=MAX_SCAN_TIME):
+        # A scan that outlives its lease (or a stalled heartbeat) would let another worker rescan the target
+        if heartbeat_ttl <= max_scan_time or lease_ttl <= max_scan_time:
+            raise ValueError(f"heartbeat_ttl and lease_ttl must exceed max_scan_time ({max_scan_time}s)")
+        self.targets = list(dict.fromkeys(targets))
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat_ttl = heartbeat_ttl
+        self.lease_ttl = lease_ttl
+        self._connect = connect or postgres_connect
+        self.conn = self._connect()
+        # psycopg2 uses %s placeholders, sqlite3 uses ?
+        self._placeholder = "?" if isinstance(self.conn, sqlite3.Connection) else "%s"
+        self.ring = HashRing()
+        self.held = set()
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread = None
+
+    def _execute(self, query, params=()):
+        cursor = self.conn.cursor()
+        cursor.execute(query.replace("%s", self._placeholder), params)
+        return cursor
+
+    def ensure_schema(self):
+        """Create the worker and lease tables if they do not exist yet."""
+        for statement in SCHEMA:
+            self._execute(statement)
+        self.conn.commit()
+
+    def join(self):
+        """Register this worker and build the initial ring."""
+        self.ensure_schema()
+        now = time.time()
+        self._execute(
+            """
+            INSERT INTO scan_workers (worker_id, started_at, heartbeat_at) VALUES (%s, %s, %s)
+            ON CONFLICT (worker_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at
+            """,
+            (self.worker_id, now, now)
+        )
+        self.conn.commit()
+        self.refresh_membership()
+        self.start_heartbeat()
+        logger.info(f"Worker {self.worker_id} joined with {len(self.ring.nodes)} live worker(s)")
+
+    def start_heartbeat(self):
+        """
+        Keep this worker's heartbeat fresh from a background thread with its
+        own connection, so a slow scan never makes the worker look dead.
+        """
+        if self._heartbeat_thread is not None:
+            return
+        self._heartbeat_stop.clear()
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat_loop, name=f"heartbeat-{self.worker_id}", daemon=True
+        )
+        self._heartbeat_thread.start()
+
+    def stop_heartbeat(self):
+        """Stop the background heartbeat (peers will treat this worker as dead after heartbeat_ttl)."""
+        if self._heartbeat_thread is None:
+            return
+        self._heartbeat_stop.set()
+        self._heartbeat_thread.join()
+        self._heartbeat_thread = None
+
+    def _heartbeat_loop(self):
+        conn = self._connect()
+        query = "UPDATE scan_workers SET heartbeat_at = %s WHERE worker_id = %s".replace("%s", self._placeholder)
+        try:
+            while not self._heartbeat_stop.wait(self.heartbeat_ttl / 3):
+                try:
+                    cursor = conn.cursor()
+                    cursor.execute(query, (time.time(), self.worker_id))
+                    conn.commit()
+                except Exception as e:
+                    logger.error(f"Heartbeat for {self.worker_id} failed: {str(e)}")
+                    conn.rollback()
+        finally:
+            conn.close()
+
+    def leave(self):
+        """Release every lease and deregister so the others rebalance immediately."""
+        self.stop_heartbeat()
+        self._execute(
+            "UPDATE scan_leases SET worker_id = NULL, lease_expires_at = NULL WHERE worker_id = %s",
+            (self.worker_id,)
+        )
+        self._execute("DELETE FROM scan_workers WHERE worker_id = %s", (self.worker_id,))
+        self.conn.commit()
+        self.held.clear()
+        logger.info(f"Worker {self.worker_id} left")
+
+    def close(self):
+        self.stop_heartbeat()
+        self.conn.close()
+
+    def heartbeat(self):
+        """
+        Refresh this worker's heartbeat and the live membership.
+        Returns True if the ring changed (a worker joined, left or died).
+        """
+        self._execute(
+            "UPDATE scan_workers SET heartbeat_at = %s WHERE worker_id = %s",
+            (time.time(), self.worker_id)
+        )
+        self.conn.commit()
+        return self.refresh_membership()
+
+    def refresh_membership(self):
+        """Rebuild the ring from live workers and free expired leases held by dead ones."""
+        now = time.time()
+        cutoff = now - self.heartbeat_ttl
+        # Lease rows are kept (only unassigned) so last_scanned_at survives rebalancing.
+        # An unexpired lease may still cover a scan in progress, so it is left to run out.
+        self._execute(
+            """
+            UPDATE scan_leases SET worker_id = NULL, lease_expires_at = NULL
+            WHERE lease_expires_at < %s AND worker_id IN
+                (SELECT worker_id FROM scan_workers WHERE heartbeat_at < %s)
+            """,
+            (now, cutoff)
+        )
+        # Restarted workers get a new hostname-pid id, so old rows would pile up forever
+        self._execute(
+            "DELETE FROM scan_workers WHERE heartbeat_at < %s",
+            (now - WORKER_RETENTION * self.heartbeat_ttl,)
+        )
+        rows = self._execute(
+            "SELECT worker_id FROM scan_workers WHERE heartbeat_at >= %s", (cutoff,)
+        ).fetchall()
+        self.conn.commit()
+
+        live = {row[0] for row in rows}
+        live.add(self.worker_id)
+        if live == self.ring.nodes:
+            return False
+
+        logger.info(f"Rebalancing: live workers {sorted(live)}")
+        self.ring = HashRing(live)
+        for target in list(self.held):
+            if self.ring.get(target) != self.worker_id:
+                self.release(target)
+        return True
+
+    def owned_targets(self):
+        """Targets this worker is responsible for under the current ring."""
+        return [target for target in self.targets if self.ring.get(target) == self.worker_id]
+
+    def claim(self, target):
+        """
+        Take (or renew) the lease on a target.
+        Returns (claimed, last_scanned_at); the claim fails while another
+        worker still holds an unexpired lease on it.
+        """
+        now = time.time()
+        cursor = self._execute(
+            """
+            INSERT INTO scan_leases (target, worker_id, lease_expires_at) VALUES (%s, %s, %s)
+            ON CONFLICT (target) DO UPDATE
+                SET worker_id = excluded.worker_id, lease_expires_at = excluded.lease_expires_at
+                WHERE scan_leases.worker_id IS NULL
+                   OR scan_leases.worker_id = excluded.worker_id
+                   OR scan_leases.lease_expires_at < %s
+            """,
+            (target, self.worker_id, now + self.lease_ttl, now)
+        )
+        claimed = cursor.rowcount > 0
+        last_scanned_at = None
+        if claimed:
+            row = self._execute(
+                "SELECT last_scanned_at FROM scan_leases WHERE target = %s", (target,)
+            ).fetchone()
+            last_scanned_at = row[0] if row else None
+            self.held.add(target)
+        self.conn.commit()
+        return claimed, last_scanned_at
+
+    def release(self, target):
+        """Give up the lease on a target that now belongs to another worker."""
+        self._execute(
+            "UPDATE scan_leases SET worker_id = NULL, lease_expires_at = NULL WHERE target = %s AND worker_id = %s",
+            (target, self.worker_id)
+        )
+        self.conn.commit()
+        self.held.discard(target)
+
+    def run_sweep(self, scan_fn, max_age=None, rebalance=False):
+        """
+        Scan every target this worker owns.
+
+        scan_fn(target) should return a truthy value on success. When max_age
+        is given, targets already scanned (by any worker) within the last
+        max_age seconds are skipped, so a sweep triggered by a rebalance only
+        picks up work orphaned by a departed worker. A rebalance sweep is
+        counted in the rebalance_* columns and leaves the progress of the
+        periodic sweep untouched.
+        """
+        self.heartbeat()
+        owned = self.owned_targets()
+        if rebalance:
+            self._execute(
+                "UPDATE scan_workers SET rebalances = rebalances + 1 WHERE worker_id = %s",
+                (self.worker_id,)
+            )
+        else:
+            self._execute(
+                """
+                UPDATE scan_workers
+                SET sweep = sweep + 1, targets_owned = %s, targets_done = 0, targets_failed = 0
+                WHERE worker_id = %s
+                """,
+                (len(owned), self.worker_id)
+            )
+        self.conn.commit()
+        prefix = "rebalance" if rebalance else "targets"
+
+        scanned = []
+        for target in owned:
+            # A long sweep must keep the heartbeat fresh, and may find the ring changed
+            self.heartbeat()
+            if self.ring.get(target) != self.worker_id:
+                continue
+
+            claimed, last_scanned_at = self.claim(target)
+            if not claimed:
+                logger.info(f"Target {target} still leased by another worker, skipping")
+                continue
+            if max_age is not None and last_scanned_at and time.time() - last_scanned_at < max_age:
+                continue
+
+            try:
+                ok = bool(scan_fn(target))
+            except Exception as e:
+                logger.error(f"Scan of {target} failed: {str(e)}")
+                ok = False
+
+            if ok:
+                self._execute(
+                    "UPDATE scan_leases SET last_scanned_at = %s WHERE target = %s AND worker_id = %s",
+                    (time.time(), target, self.worker_id)
+                )
+                scanned.append(target)
+            counter = f"{prefix}_done" if ok else f"{prefix}_failed"
+            self._execute(
+                f"""
+                UPDATE scan_workers
+                SET {counter} = {counter} + 1, total_scanned = total_scanned + 1, last_target = %s
+                WHERE worker_id = %s
+                """,
+                (target, self.worker_id)
+            )
+            self.conn.commit()
+        return scanned
+
+    def progress(self):
+        """Per-worker progress for the current sweep, including recently dead workers."""
+        cutoff = time.time() - self.heartbeat_ttl
+        rows = self._execute(
+            """
+            SELECT worker_id, heartbeat_at, sweep, targets_owned, targets_done,
+                   targets_failed, total_scanned, last_target,
+                   rebalances, rebalance_done, rebalance_failed
+            FROM scan_workers ORDER BY worker_id
+            """
+        ).fetchall()
+        self.conn.commit()
+        return [
+            {
+                "worker_id": row[0],
+                "alive": row[1] >= cutoff,
+                "sweep": row[2],
+                "targets_owned": row[3],
+                "targets_done": row[4],
+                "targets_failed": row[5],
+                "total_scanned": row[6],
+                "last_target": row[7],
+                "rebalances": row[8],
+                "rebalance_done": row[9],
+                "rebalance_failed": row[10]
+            }
+            for row in rows
+        ]
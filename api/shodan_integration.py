@@ -1,5 +1,7 @@
 import requests
 import psycopg2
+import src_path
+from http_client import get_client
 from flask import Flask, jsonify
 
 app = Flask(__name__)
@@ -23,7 +25,7 @@ def fetch_shodan_data(ip_address):
     """
     url = SHODAN_URL.format(ip=ip_address, api_key=SHODAN_API_KEY)
     try:
-        response = requests.get(url)
+        response = get_client().get(url, provider="shodan")
         response.raise_for_status()  # Raise an error for bad status codes
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -42,7 +44,7 @@ def store_threat_data(ip_address, data):
         # Insert the data into the threat_data table
         cursor.execute(
             "INSERT INTO threat_data (ip_address, ports, services) VALUES (%s, %s, %s)",
-            (ip_address, str(data.get('ports')), str(data.get('hostnames')))
+            (ip_address, str(data.get('ports')), str(data.get('hostnames'))))
         conn.commit()  # Commit the transaction
         print("Data stored successfully!")
     except psycopg2.Error as e:
@@ -66,5 +68,12 @@ def shodan_integration(ip_address):
     else:
         return jsonify({"status": "error", "message": "Failed to fetch Shodan data"}), 500
 
+@app.route('/api/http_stats', methods=['GET'])
+def http_stats():
+    """
+    Endpoint exposing per-host connection reuse, latency and circuit breaker state.
+    """
+    return jsonify(get_client().stats()), 200
+
 if __name__ == "__main__":
     app.run(debug=True)  # Run the Flask app in debug mode
\ No newline at end of file
@@ -0,0 +1,13 @@
+"""
+Makes the shared modules in src/ (http_client, correlation_engine, ...)
+importable from the api scripts, whichever directory they are run from.
+Import it before any src module.
+"""
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Appended, not prepended: src/logging.py would otherwise shadow the standard library
+if SRC_DIR not in sys.path:
+    sys.path.append(SRC_DIR)
@@ -0,0 +1,396 @@
+"""
+Threat Data Retention
+Keeps threat_data as a time-partitioned PostgreSQL table: creates future
+partitions ahead of time, detaches and drops (or archives) expired ones as a
+metadata-only operation, and maintains hourly/daily rollup tables so long-range
+dashboard queries read pre-aggregated rows instead of raw events.
+"""
+import argparse
+import re
+import statistics
+import time
+from datetime import datetime, timedelta
+
+# Database configuration (same PostgreSQL instance as shodan_integration.py)
+DB_CONFIG = {
+    "dbname": "threat_intel",
+    "user": "admin",
+    "password": "1234",
+    "host": "localhost",
+    "port": "5432"
+}
+
+PERIODS = {"day": ("p", timedelta(days=1)), "week": ("w", timedelta(days=7))}
+PARTITION_NAME = re.compile(r"^(?P<table>\w+)_(?P<kind>[pw])(?P<start>\d{8})$")
+
+ARCHIVE_SCHEMA = "threat_archive"
+ROLLUP_LOOKBACK = timedelta(hours=1)  # Re-aggregate recent buckets to absorb late rows
+
+# Shared by every partitioned table, including the benchmark's scratch tables
+WATERMARKS_DDL = """
+    CREATE TABLE IF NOT EXISTS rollup_watermarks (
+        rollup_table VARCHAR(255) PRIMARY KEY,
+        rolled_up_to TIMESTAMP NOT NULL
+    )
+"""
+BENCHMARK_TABLES = "bench_flat, bench_part, bench_part_hourly, bench_part_daily"
+
+
+def postgres_connect():
+    """Open a connection to the threat_intel database."""
+    import psycopg2
+    return psycopg2.connect(**DB_CONFIG)
+
+
+def create_schema(conn, table="threat_data"):
+    """Create the partitioned parent table and its rollup tables (see db/threat_data_partitioning.sql)."""
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id BIGSERIAL,
+            ip_address VARCHAR(15) NOT NULL,
+            ports TEXT,
+            services TEXT,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_created_ip ON {table} (created_at, ip_address)")
+    for rollup in ("hourly", "daily"):
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table}_{rollup} (
+                bucket TIMESTAMP NOT NULL,
+                ip_address VARCHAR(15) NOT NULL,
+                event_count BIGINT NOT NULL,
+                first_seen TIMESTAMP NOT NULL,
+                last_seen TIMESTAMP NOT NULL,
+                PRIMARY KEY (bucket, ip_address)
+            )
+        """)
+    cursor.execute(WATERMARKS_DDL)
+    conn.commit()
+    cursor.close()
+
+
+def partition_period(name):
+    """Return "day" or "week" for a partition name created by this module, else None."""
+    match = PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return "day" if match.group("kind") == "p" else "week"
+
+
+def _period_start(moment, period):
+    day = datetime(moment.year, moment.month, moment.day)
+    if period == "week":
+        day -= timedelta(days=day.weekday())  # Weeks start on Monday
+    return day
+
+
+def list_partitions(conn, table="threat_data"):
+    """Return [(name, start, end)] for the table's range partitions, oldest first."""
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT c.relname FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        """,
+        (table,)
+    )
+    partitions = []
+    for (name,) in cursor.fetchall():
+        match = PARTITION_NAME.match(name)
+        if not match or match.group("table") != table:
+            continue  # The DEFAULT partition and anything created by hand
+        start = datetime.strptime(match.group("start"), "%Y%m%d")
+        step = PERIODS[partition_period(name)][1]
+        partitions.append((name, start, start + step))
+    cursor.close()
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def ensure_partitions(conn, table="threat_data", period="day", ahead=7, now=None):
+    """
+    Create partitions from the current period through `ahead` periods into the future,
+    plus any periods missed since the newest partition while the job was down.
+    Raises ValueError if the table already has partitions of another period,
+    since daily and weekly ranges would overlap.
+
+    Each partition is created in its own transaction; one that fails is
+    reported and skipped so the rest of the maintenance run still happens.
+    """
+    prefix, step = PERIODS[period]
+    start = _period_start(now or datetime.now(), period)
+    partitions = list_partitions(conn, table)
+    existing = {name for name, _, _ in partitions}
+    other = sorted({partition_period(name) for name in existing} - {period})
+    if other:
+        raise ValueError(f"{table} is partitioned by {other[0]}, not {period}; run with --period {other[0]}")
+    lower = min(start, partitions[-1][2]) if partitions else start
+    created = []
+    cursor = conn.cursor()
+    while lower <= start + ahead * step:
+        name = f"{table}_{prefix}{lower:%Y%m%d}"
+        if name not in existing:
+            try:
+                _create_partition(cursor, table, name, lower, lower + step)
+                conn.commit()
+                created.append(name)
+            except Exception as e:
+                conn.rollback()
+                print(f"Could not create partition {name}: {e}")
+        lower += step
+    cursor.close()
+    return created
+
+
+def _create_partition(cursor, table, name, lower, upper):
+    """
+    Create one range partition. Rows for the range that already landed in the
+    DEFAULT partition would violate its new constraint, so DEFAULT is detached,
+    the rows are moved into the new partition and DEFAULT is re-attached.
+    """
+    default = f"{table}_default"
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {default} WHERE created_at >= %s AND created_at < %s)",
+        (lower, upper)
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)", (lower, upper))
+        return
+    cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {default}")
+    cursor.execute(f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)", (lower, upper))
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {default} WHERE created_at >= %s AND created_at < %s RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+        """,
+        (lower, upper)
+    )
+    print(f"Moved {cursor.rowcount} row(s) from {default} into {name}")
+    cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT")
+
+
+def expired_partitions(partitions, retention_days, now=None):
+    """Names of the [(name, start, end)] partitions whose whole range is older than retention_days."""
+    cutoff = (now or datetime.now()) - timedelta(days=retention_days)
+    return [name for name, _, end in partitions if end <= cutoff]
+
+
+def expire_partitions(conn, retention_days, table="threat_data", archive=False, now=None):
+    """
+    Detach partitions whose whole range is older than retention_days, then drop
+    them or move them into the archive schema. Both are catalog-only operations,
+    so the cost does not depend on how many rows the partition holds.
+    """
+    expired = expired_partitions(list_partitions(conn, table), retention_days, now)
+    cursor = conn.cursor()
+    if archive:
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+    for name in expired:
+        cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+        if archive:
+            cursor.execute(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}")
+        else:
+            cursor.execute(f"DROP TABLE {name}")
+    conn.commit()
+    cursor.close()
+    return expired
+
+
+def refresh_rollups(conn, table="threat_data", now=None):
+    """
+    Aggregate closed hours into {table}_hourly and closed days into
+    {table}_daily, starting from each rollup's watermark. Re-running is
+    idempotent: buckets are recomputed and upserted, never incremented.
+    """
+    now = now or datetime.now()
+    cursor = conn.cursor()
+    rolled = {}
+    for rollup, unit, source, count_expr in (
+        ("hourly", "hour", table, "COUNT(*)"),
+        ("daily", "day", f"{table}_hourly", "SUM(event_count)")
+    ):
+        rollup_table = f"{table}_{rollup}"
+        upper = now.replace(minute=0, second=0, microsecond=0)
+        if unit == "day":
+            upper = upper.replace(hour=0)
+        cursor.execute("SELECT rolled_up_to FROM rollup_watermarks WHERE rollup_table = %s", (rollup_table,))
+        row = cursor.fetchone()
+        lower = row[0] - ROLLUP_LOOKBACK if row else datetime(1970, 1, 1)
+        if unit == "day":
+            lower = lower.replace(hour=0, minute=0, second=0, microsecond=0)
+        if lower >= upper:
+            continue
+
+        time_column = "created_at" if source == table else "bucket"
+        first_seen = "MIN(created_at)" if source == table else "MIN(first_seen)"
+        last_seen = "MAX(created_at)" if source == table else "MAX(last_seen)"
+        cursor.execute(
+            f"""
+            INSERT INTO {rollup_table} (bucket, ip_address, event_count, first_seen, last_seen)
+            SELECT date_trunc('{unit}', {time_column}), ip_address, {count_expr}, {first_seen}, {last_seen}
+            FROM {source}
+            WHERE {time_column} >= %s AND {time_column} < %s
+            GROUP BY 1, 2
+            ON CONFLICT (bucket, ip_address) DO UPDATE SET
+                event_count = EXCLUDED.event_count,
+                first_seen = EXCLUDED.first_seen,
+                last_seen = EXCLUDED.last_seen
+            """,
+            (lower, upper)
+        )
+        rolled[rollup_table] = cursor.rowcount
+        cursor.execute(
+            """
+            INSERT INTO rollup_watermarks (rollup_table, rolled_up_to) VALUES (%s, %s)
+            ON CONFLICT (rollup_table) DO UPDATE SET rolled_up_to = EXCLUDED.rolled_up_to
+            """,
+            (rollup_table, upper)
+        )
+    conn.commit()
+    cursor.close()
+    return rolled
+
+
+def expire_rollups(conn, hourly_retention_days, table="threat_data", now=None):
+    """Trim old hourly buckets; daily rollups are small and kept indefinitely."""
+    cutoff = (now or datetime.now()) - timedelta(days=hourly_retention_days)
+    cursor = conn.cursor()
+    cursor.execute(f"DELETE FROM {table}_hourly WHERE bucket < %s", (cutoff,))
+    deleted = cursor.rowcount
+    conn.commit()
+    cursor.close()
+    return deleted
+
+
+def run_maintenance(period="day", ahead=7, retention_days=90, hourly_retention_days=30, archive=False):
+    """Create upcoming partitions, refresh rollups and expire old data."""
+    conn = postgres_connect()
+    try:
+        created = ensure_partitions(conn, period=period, ahead=ahead)
+        rolled = refresh_rollups(conn)
+        expired = expire_partitions(conn, retention_days, archive=archive)
+        trimmed = expire_rollups(conn, hourly_retention_days)
+        # Only the newest partitions change, so analyze those instead of the whole table
+        cursor = conn.cursor()
+        for name, _, _ in list_partitions(conn)[-(ahead + 2):]:
+            cursor.execute(f"ANALYZE {name}")
+        conn.commit()
+        cursor.close()
+        print(f"Partitions created: {created}, expired: {expired}, "
+              f"rollup rows: {rolled}, hourly buckets trimmed: {trimmed}")
+    finally:
+        conn.close()
+
+
+def _time_query(cursor, query, params, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(query, params)
+        cursor.fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def _drop_benchmark_tables(conn):
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {BENCHMARK_TABLES} CASCADE")
+    cursor.execute("DELETE FROM rollup_watermarks WHERE rollup_table LIKE 'bench_part_%'")
+    conn.commit()
+    cursor.close()
+
+
+def benchmark(sizes=(10_000, 100_000, 1_000_000), days=90):
+    """
+    Compare query latency as the table grows: a 30-day per-day event count
+    on an unpartitioned table, on the partitioned table, and on the daily
+    rollup. Uses scratch tables that are dropped afterwards.
+    """
+    conn = postgres_connect()
+    cursor = conn.cursor()
+    now = _period_start(datetime.now(), "day")
+    window = (now - timedelta(days=30), now)
+    results = []
+    # The cleanup below needs the watermark table even on a database the migration never touched
+    cursor.execute(WATERMARKS_DDL)
+    conn.commit()
+    try:
+        for size in sizes:
+            _drop_benchmark_tables(conn)
+            create_schema(conn, "bench_part")
+            ensure_partitions(conn, "bench_part", ahead=0, now=now)
+            for i in range(1, days + 1):
+                ensure_partitions(conn, "bench_part", ahead=0, now=now - timedelta(days=i))
+            cursor.execute("""
+                CREATE TABLE bench_flat (
+                    id BIGSERIAL PRIMARY KEY, ip_address VARCHAR(15) NOT NULL,
+                    ports TEXT, services TEXT, created_at TIMESTAMP NOT NULL
+                )
+            """)
+            cursor.execute("CREATE INDEX ON bench_flat (created_at, ip_address)")
+            for target in ("bench_flat", "bench_part"):
+                cursor.execute(
+                    f"""
+                    INSERT INTO {target} (ip_address, ports, services, created_at)
+                    SELECT '10.0.' || (g % 50) || '.' || (g % 200), '[80, 443]', '[]',
+                           %s - (random() * %s) * INTERVAL '1 day'
+                    FROM generate_series(1, %s) AS g
+                    """,
+                    (now, days, size)
+                )
+            conn.commit()
+            cursor.execute("ANALYZE bench_flat")
+            cursor.execute("ANALYZE bench_part")
+            refresh_rollups(conn, "bench_part", now=now)
+
+            raw_query = "SELECT date_trunc('day', created_at), COUNT(*) FROM {} WHERE created_at >= %s AND created_at < %s GROUP BY 1"
+            results.append({
+                "rows": size,
+                "flat_ms": _time_query(cursor, raw_query.format("bench_flat"), window),
+                "partitioned_ms": _time_query(cursor, raw_query.format("bench_part"), window),
+                "rollup_ms": _time_query(
+                    cursor,
+                    "SELECT bucket, SUM(event_count) FROM bench_part_daily WHERE bucket >= %s AND bucket < %s GROUP BY 1",
+                    window
+                )
+            })
+            print(f"{size:>10} rows: flat {results[-1]['flat_ms']:.1f}ms, "
+                  f"partitioned {results[-1]['partitioned_ms']:.1f}ms, rollup {results[-1]['rollup_ms']:.1f}ms")
+    finally:
+        conn.rollback()
+        _drop_benchmark_tables(conn)
+        cursor.close()
+        conn.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="threat_data partition retention and rollups")
+    parser.add_argument("--period", choices=PERIODS, default="day")
+    parser.add_argument("--ahead", type=int, default=7, help="Future partitions to keep ready")
+    parser.add_argument("--retention-days", type=int, default=90)
+    parser.add_argument("--hourly-retention-days", type=int, default=30)
+    parser.add_argument("--archive", action="store_true", help="Move expired partitions to the archive schema instead of dropping")
+    parser.add_argument("--benchmark", action="store_true", help="Measure query latency at increasing table sizes")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark()
+    else:
+        import schedule
+
+        def maintenance():
+            run_maintenance(args.period, args.ahead, args.retention_days, args.hourly_retention_days, args.archive)
+
+        maintenance()
+        # Rollups close every hour, so run maintenance hourly
+        schedule.every(1).hours.do(maintenance)
+        while True:
+            schedule.run_pending()
+            time.sleep(60)
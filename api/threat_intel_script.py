@@ -1,5 +1,7 @@
 import requests
 import mysql.connector
+import src_path
+from http_client import get_client
 import time
 from datetime import datetime
 
@@ -36,7 +38,11 @@ def store_threat_data(asset_id, threat_name, vulnerability_description, likeliho
 # Function to fetch data from Shodan
 def fetch_shodan_data(ip):
     url = f"https://api.shodan.io/shodan/host/{ip}?key={SHODAN_API_KEY}"
-    response = requests.get(url).json()
+    try:
+        response = get_client().get(url, provider="shodan").json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Shodan request failed: {e}")
+        return
     if "error" not in response:
         ports = response.get('ports', [])
         threat_name = f"Open Ports: {ports}"
@@ -46,7 +52,11 @@ def fetch_shodan_data(ip):
 def fetch_hibp_data(email):
     url = f"https://haveibeenpwned.com/api/v3/breachedaccount/{email}"
     headers = {"hibp-api-key": HIBP_API_KEY}
-    response = requests.get(url, headers=headers)
+    try:
+        response = get_client().get(url, headers=headers, provider="hibp")
+    except requests.exceptions.RequestException as e:
+        print(f"HIBP request failed: {e}")
+        return
     if response.status_code == 200:
         breaches = response.json()
         if breaches:
@@ -57,7 +67,11 @@ def fetch_hibp_data(email):
 def fetch_securitytrails_data(domain):
     url = f"https://api.securitytrails.com/v1/domain/{domain}/subdomains"
     headers = {"APIKEY": SECURITYTRAILS_API_KEY}
-    response = requests.get(url, headers=headers).json()
+    try:
+        response = get_client().get(url, headers=headers, provider="securitytrails").json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"SecurityTrails request failed: {e}")
+        return
     if "subdomains" in response:
         subdomains = response["subdomains"]
         threat_name = f"Subdomains Found: {len(subdomains)}"
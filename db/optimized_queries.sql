@@ -8,6 +8,7 @@ CREATE EXTENSION IF NOT EXISTS pg_trgm;  -- PostgreSQL specific
 CREATE INDEX idx_threat_description_trgm ON threat_data USING gin (description gin_trgm_ops);
 
 -- Regularly analyze tables for query optimization
+-- (once threat_data is partitioned, api/threat_data_retention.py analyzes only the recent partitions)
 ANALYZE threat_data;
 
 -- Set up automated vacuum for PostgreSQL (adjust for your DBMS)
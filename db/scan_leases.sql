@@ -0,0 +1,32 @@
+-- Worker registry and per-target leases for sharded OSINT scanning (api/shard_coordinator.py)
+CREATE TABLE IF NOT EXISTS scan_workers (
+    worker_id VARCHAR(255) PRIMARY KEY,
+    started_at DOUBLE PRECISION NOT NULL,      -- Unix epoch seconds
+    heartbeat_at DOUBLE PRECISION NOT NULL,
+    sweep INTEGER DEFAULT 0,
+    targets_owned INTEGER DEFAULT 0,
+    targets_done INTEGER DEFAULT 0,
+    targets_failed INTEGER DEFAULT 0,
+    rebalances INTEGER DEFAULT 0,              -- Sweeps triggered by a membership change,
+    rebalance_done INTEGER DEFAULT 0,          -- counted apart from the periodic sweep
+    rebalance_failed INTEGER DEFAULT 0,
+    total_scanned INTEGER DEFAULT 0,
+    last_target VARCHAR(255)
+);
+
+CREATE TABLE IF NOT EXISTS scan_leases (
+    target VARCHAR(255) PRIMARY KEY,
+    worker_id VARCHAR(255),                    -- NULL once released; the row keeps last_scanned_at
+    lease_expires_at DOUBLE PRECISION,
+    last_scanned_at DOUBLE PRECISION
+);
+
+CREATE INDEX IF NOT EXISTS idx_scan_leases_worker ON scan_leases(worker_id);
+
+-- Per-worker progress for the current sweep
+SELECT worker_id,
+       heartbeat_at >= EXTRACT(EPOCH FROM NOW()) - 240 AS alive  -- HEARTBEAT_TTL,
+       sweep, targets_done, targets_owned, targets_failed,
+       rebalances, rebalance_done, rebalance_failed, last_target
+FROM scan_workers
+ORDER BY worker_id;
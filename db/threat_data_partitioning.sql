@@ -0,0 +1,88 @@
+-- Time-partitioned threat_data with hourly/daily rollups (PostgreSQL 11+)
+-- Partitions and rollups are maintained by api/threat_data_retention.py
+
+-- Migrate the existing single table
+ALTER TABLE threat_data RENAME TO threat_data_legacy;
+
+CREATE TABLE threat_data (
+    id BIGSERIAL,
+    ip_address VARCHAR(15) NOT NULL,
+    ports TEXT,
+    services TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)          -- Must include the partition key
+) PARTITION BY RANGE (created_at);
+
+-- Catches rows outside every pre-created partition; should stay (nearly) empty
+CREATE TABLE threat_data_default PARTITION OF threat_data DEFAULT;
+
+-- Declared on the parent, created on every partition
+CREATE INDEX idx_threat_data_created_ip ON threat_data (created_at, ip_address);
+
+-- One partition per day, named threat_data_pYYYYMMDD, or per week (from Monday), named threat_data_wYYYYMMDD.
+-- Pick the period before running this file, e.g. SET threat_data.partition_period = 'week';
+-- (default: day), and run threat_data_retention.py with the same --period; it refuses a different one.
+-- Create the periods covered by the legacy rows plus the next 7 (the job's default --ahead), so new rows
+-- never land in DEFAULT before threat_data_retention.py first runs; the job keeps creating future ones.
+DO $$
+DECLARE
+    period TEXT := COALESCE(NULLIF(current_setting('threat_data.partition_period', true), ''), 'day');
+    step INTERVAL;
+    prefix TEXT;
+    period_start DATE;
+BEGIN
+    IF period NOT IN ('day', 'week') THEN
+        RAISE EXCEPTION 'threat_data.partition_period must be day or week, not %', period;
+    END IF;
+    step := CASE period WHEN 'week' THEN INTERVAL '7 days' ELSE INTERVAL '1 day' END;
+    prefix := CASE period WHEN 'week' THEN 'threat_data_w' ELSE 'threat_data_p' END;
+    FOR period_start IN
+        SELECT generate_series(date_trunc(period, COALESCE(MIN(created_at), CURRENT_DATE)),
+                               date_trunc(period, CURRENT_DATE) + 7 * step, step)::date
+        FROM threat_data_legacy
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF threat_data FOR VALUES FROM (%L) TO (%L)',
+            prefix || to_char(period_start, 'YYYYMMDD'), period_start, period_start + step
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO threat_data (ip_address, ports, services, created_at)
+SELECT ip_address, ports, services, created_at FROM threat_data_legacy;
+
+-- Pre-aggregated rollups for dashboards
+CREATE TABLE threat_data_hourly (
+    bucket TIMESTAMP NOT NULL,
+    ip_address VARCHAR(15) NOT NULL,
+    event_count BIGINT NOT NULL,
+    first_seen TIMESTAMP NOT NULL,
+    last_seen TIMESTAMP NOT NULL,
+    PRIMARY KEY (bucket, ip_address)
+);
+
+CREATE TABLE threat_data_daily (
+    bucket TIMESTAMP NOT NULL,
+    ip_address VARCHAR(15) NOT NULL,
+    event_count BIGINT NOT NULL,
+    first_seen TIMESTAMP NOT NULL,
+    last_seen TIMESTAMP NOT NULL,
+    PRIMARY KEY (bucket, ip_address)
+);
+
+-- How far each rollup has been aggregated
+CREATE TABLE rollup_watermarks (
+    rollup_table VARCHAR(255) PRIMARY KEY,
+    rolled_up_to TIMESTAMP NOT NULL
+);
+
+-- Expiring a day is a catalog operation, independent of its row count
+-- ALTER TABLE threat_data DETACH PARTITION threat_data_p20250301;
+-- DROP TABLE threat_data_p20250301;
+
+-- Dashboard: events per day over the last 90 days, read from the rollup
+SELECT bucket, SUM(event_count) AS events, COUNT(*) AS distinct_ips
+FROM threat_data_daily
+WHERE bucket >= CURRENT_DATE - INTERVAL '90 days'
+GROUP BY bucket
+ORDER BY bucket;
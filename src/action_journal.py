@@ -0,0 +1,300 @@
+"""
+Action Journal Module
+Buffered, append-only, segmented log of remediation/defense actions with a
+bounded in-memory ring of recent actions and secondary indexes by field
+(e.g. threat type, target) and time, rebuilt from disk on restart.
+
+Segment offsets are tracked in memory, so a journal directory has a single
+writer. Within a process, open_journal() hands every caller the same
+ActionJournal for a directory; across processes, an exclusive lock on the
+directory's .lock file makes a second writer raise RuntimeError.
+"""
+import os
+import json
+import atexit
+import bisect
+import logging
+import threading
+import weakref
+from collections import deque
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+RING_SIZE = 1000                        # Recent actions kept in memory
+SEGMENT_MAX_BYTES = 8 * 1024 * 1024     # Roll over to a new segment beyond this
+MAX_SEGMENTS = 64                       # Oldest segments are deleted beyond this
+FLUSH_EVERY = 50                        # Records buffered before writing
+FLUSH_INTERVAL = 5.0                    # Seconds a record may sit in the buffer
+
+# Absolute directory -> the journal writing it in this process; weak, so a
+# dropped journal does not stay registered
+_journals = weakref.WeakValueDictionary()
+_journals_lock = threading.RLock()
+
+
+def _lock_file(f):
+    """Take a non-blocking exclusive lock on an open file; raises OSError if it is held."""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+
+def _close_at_exit(ref):
+    # Held through a weakref so the exit hook does not keep a dropped journal alive
+    journal = ref()
+    if journal is not None:
+        journal._release()
+
+
+def open_journal(directory, **options):
+    """
+    Return this process's journal for `directory`, opening it on first use
+    (options only apply then). Each call should be paired with close().
+    """
+    with _journals_lock:
+        journal = _journals.get(os.path.abspath(directory))
+        if journal is not None:
+            journal._users += 1
+            return journal
+        return ActionJournal(directory, **options)
+
+
+def _to_epoch(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+class ActionJournal:
+    def __init__(self, directory, index_fields=("threat_type", "target"), ring_size=RING_SIZE,
+                 segment_max_bytes=SEGMENT_MAX_BYTES, max_segments=MAX_SEGMENTS,
+                 flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.index_fields = tuple(index_fields)
+        self.segment_max_bytes = segment_max_bytes
+        self.max_segments = max_segments
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.ring = deque(maxlen=ring_size)
+
+        # Every record is located by (timestamp, segment, offset, length);
+        # the timeline is in append order, field indexes map value -> [location]
+        self._timeline = []
+        self._indexes = {field: {} for field in self.index_fields}
+        self._buffer = []
+        self._flush_timer = None
+        self._sorted = True  # Timeline in timestamp order, so time ranges can be bisected
+        self._lock = threading.RLock()
+
+        self._key = os.path.abspath(self.directory)
+        self._users = 1
+        with _journals_lock:
+            if self._key in _journals:
+                raise RuntimeError(f"Journal {self.directory} is already open in this process; use open_journal()")
+            os.makedirs(self.directory, exist_ok=True)
+            # The lock is held until the last close(), or until the process exits
+            self._lock_handle = open(os.path.join(self.directory, ".lock"), "a+b")
+            try:
+                _lock_file(self._lock_handle)
+            except OSError:
+                self._lock_handle.close()
+                raise RuntimeError(f"Journal {self.directory} is already open by another writer")
+            _journals[self._key] = self
+        self._segments = self._list_segments()
+        if not self._segments:
+            self._segments = [1]
+        self._segment_size = 0
+        self._replay_segments()
+        atexit.register(_close_at_exit, weakref.ref(self))
+
+    def _segment_path(self, segment):
+        return os.path.join(self.directory, f"segment-{segment:06d}.jsonl")
+
+    def _list_segments(self):
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.startswith("segment-") and name.endswith(".jsonl"):
+                segments.append(int(name[len("segment-"):-len(".jsonl")]))
+        return sorted(segments)
+
+    def _index(self, record, location):
+        if self._timeline and location[0] < self._timeline[-1][0]:
+            self._sorted = False
+        self._timeline.append(location)
+        for field in self.index_fields:
+            value = record.get(field)
+            if value is not None:
+                self._indexes[field].setdefault(str(value), []).append(location)
+
+    def _replay_segments(self):
+        """Rebuild indexes and the recent-actions ring from the segments on disk."""
+        count = 0
+        for segment in self._segments:
+            path = self._segment_path(segment)
+            if not os.path.exists(path):
+                continue
+            offset = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Torn final write from a crash
+                    record = json.loads(line)
+                    self._index(record, (_to_epoch(record["timestamp"]), segment, offset, len(line)))
+                    self.ring.append(record)
+                    offset += len(line)
+                    count += 1
+            if os.path.getsize(path) != offset:
+                logger.warning(f"Truncating torn record at end of {path}")
+                with open(path, "r+b") as f:
+                    f.truncate(offset)
+            self._segment_size = offset
+        if count:
+            logger.info(f"Replayed {count} journal records from {len(self._segments)} segment(s)")
+
+    def append(self, record):
+        """Buffer one action record (must carry an ISO "timestamp")."""
+        line = (json.dumps(record) + "\n").encode("utf-8")
+        with self._lock:
+            if self._lock_handle.closed:
+                raise RuntimeError(f"Journal {self.directory} is closed")
+            if self._segment_size and self._segment_size + len(line) > self.segment_max_bytes:
+                self._roll_segment()
+            location = (_to_epoch(record["timestamp"]), self._segments[-1], self._segment_size, len(line))
+            self._segment_size += len(line)
+            self._buffer.append(line)
+            self._index(record, location)
+            self.ring.append(record)
+            if len(self._buffer) >= self.flush_every:
+                self.flush()
+            elif self._flush_timer is None:
+                # Bound how long a record can sit unwritten when appends are sparse
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self):
+        """Write buffered records to the current segment."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._buffer:
+                with open(self._segment_path(self._segments[-1]), "ab") as f:
+                    f.write(b"".join(self._buffer))
+                self._buffer = []
+
+    def close(self):
+        """Flush buffered records; the last user's close also releases the writer lock."""
+        with _journals_lock:
+            if self._lock_handle.closed:
+                return
+            self._users -= 1
+            if self._users > 0:
+                self.flush()
+                return
+            self._release()
+
+    def _release(self):
+        with _journals_lock, self._lock:
+            if self._lock_handle.closed:
+                return
+            self.flush()
+            self._lock_handle.close()
+            if _journals.get(self._key) is self:
+                del _journals[self._key]
+
+    def _roll_segment(self):
+        self.flush()
+        self._segments.append(self._segments[-1] + 1)
+        self._segment_size = 0
+        while len(self._segments) > self.max_segments:
+            self._drop_segment(self._segments.pop(0))
+
+    def _drop_segment(self, segment):
+        os.remove(self._segment_path(segment))
+        # Lists are in append order and segments are dropped oldest first,
+        # so the dropped records are always a prefix of each list
+        def trim(locations):
+            count = 0
+            while count < len(locations) and locations[count][1] <= segment:
+                count += 1
+            del locations[:count]
+
+        trim(self._timeline)
+        for index in self._indexes.values():
+            for value in list(index):
+                trim(index[value])
+                if not index[value]:
+                    del index[value]
+        logger.info(f"Dropped journal segment {segment}")
+
+    def _read(self, locations):
+        self.flush()
+        records = []
+        handles = {}
+        try:
+            for _, segment, offset, length in locations:
+                f = handles.get(segment)
+                if f is None:
+                    f = handles[segment] = open(self._segment_path(segment), "rb")
+                f.seek(offset)
+                records.append(json.loads(f.read(length)))
+        finally:
+            for f in handles.values():
+                f.close()
+        return records
+
+    def _window(self, locations, since, until):
+        if self._sorted:
+            lo = 0 if since is None else bisect.bisect_left(locations, (since,))
+            hi = len(locations) if until is None else bisect.bisect_left(locations, (until,))
+            return locations[lo:hi]
+        return [
+            loc for loc in locations
+            if (since is None or loc[0] >= since) and (until is None or loc[0] < until)
+        ]
+
+    def query(self, since=None, until=None, limit=None, **filters):
+        """
+        Return records matching every indexed field filter (e.g. target="1.2.3.4")
+        with since <= timestamp < until, oldest first. Candidates come from the
+        indexes, so only the matching records are read from disk.
+        """
+        since, until = _to_epoch(since), _to_epoch(until)
+        with self._lock:
+            lists = []
+            for field, value in filters.items():
+                if field not in self._indexes:
+                    raise ValueError(f"Field {field} is not indexed")
+                lists.append(self._window(self._indexes[field].get(str(value), []), since, until))
+            if not lists:
+                selected = self._window(self._timeline, since, until)
+            else:
+                lists.sort(key=len)
+                others = [set(locations) for locations in lists[1:]]
+                selected = [loc for loc in lists[0] if all(loc in other for other in others)]
+            if limit is not None:
+                # selected[-0:] would be the whole list
+                selected = selected[-limit:] if limit > 0 else []
+            return self._read(selected)
+
+    def recent(self, n=None):
+        """Most recent actions from the in-memory ring, newest last."""
+        with self._lock:
+            records = list(self.ring)
+        if n is None:
+            return records
+        return records[-n:] if n > 0 else []
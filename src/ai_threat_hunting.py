@@ -4,10 +4,11 @@ Implements AI-driven anomaly detection for proactive threat hunting.
 """
 import json
 import logging
-import requests
+from http_client import get_client
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from threat_archive import ThreatArchive
 
 # Configure logging
 logging.basicConfig(
@@ -22,6 +23,7 @@ class AIThreatHunting:
         self.config = self._load_config(config_file)
         self.llm_api_key = self.config.get("llm_api_key", "")
         self.llm_model = self.config.get("llm_model", "gpt-4")
+        self.archive = None  # Opened on first use by load_history
         
     def _load_config(self, config_file):
         """Load configuration from file."""
@@ -53,10 +55,12 @@ class AIThreatHunting:
                         ]
                     }
                     
-                    response = requests.post(
+                    response = get_client().post(
                         "https://api.openai.com/v1/chat/completions",
                         headers=headers,
-                        json=data
+                        json=data,
+                        provider="openai",
+                        timeout=(3.05, 60)
                     )
                     
                     if response.status_code == 200:
@@ -75,6 +79,21 @@ class AIThreatHunting:
             logger.error(f"Failed to predict threat behavior: {str(e)}")
             return "Failed to analyze threat due to an error."
     
+    def load_history(self, start=None, end=None, columns=None):
+        """
+        Load archived threat events in [start, end) as a DataFrame.
+        Reads memory-mapped columns from the event archive instead of the database.
+        """
+        if self.archive is None:
+            self.archive = ThreatArchive(self.config.get("archive_path", "data/threat_archive"))
+        df = self.archive.to_dataframe(start, end, columns)
+        for name in ("threat", "detail"):
+            if name in df.columns:
+                df[name] = self.archive.decode(df[name].to_numpy())
+        if "timestamp" in df.columns:
+            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="us")
+        return df
+    
     def _basic_threat_analysis(self, threat_description):
         """Provide basic threat analysis when LLM is not available."""
         threat_types = {
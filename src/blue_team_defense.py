@@ -8,6 +8,7 @@ import logging
 import json
 import requests
 from datetime import datetime
+from action_journal import open_journal
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +24,10 @@ class BlueTeamDefense:
         self.threat_intel_api = self.config.get("threat_intel_api", "https://api.threatintel.example.com/v1")
         self.blocked_ips = set()
         self.malicious_domains = set()
+        self.journal = open_journal(
+            self.config.get("defense_journal_dir", "logs/defense_actions"),
+            index_fields=("type", "target")
+        )
         
     def _load_config(self, config_file):
         """Load configuration from file."""
@@ -83,9 +88,18 @@ class BlueTeamDefense:
             "timestamp": datetime.now().isoformat()
         }
         
-        # In a real implementation, this would write to a database
-        with open("logs/defense_actions.json", "a") as f:
-            f.write(json.dumps(action) + "\n")
+        # Buffered append to the segmented action journal
+        self.journal.append(action)
+    
+    def find_actions(self, action_type=None, target=None, since=None, until=None, limit=None):
+        """Look up recorded defensive actions by type and/or target within a time range."""
+        filters = {"type": action_type, "target": target}
+        filters = {field: value for field, value in filters.items() if value is not None}
+        return self.journal.query(since=since, until=until, limit=limit, **filters)
+    
+    def close(self):
+        """Flush pending actions and release this instance's hold on the journal."""
+        self.journal.close()
 
 # Example usage
 if __name__ == "__main__":
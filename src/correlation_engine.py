@@ -0,0 +1,209 @@
+"""
+Cross-Source Correlation Engine
+Joins Shodan, HIBP and SecurityTrails observations about the same asset as
+they arrive and emits composite high-risk findings. State is kept in hash
+indexes per asset and per IOC, limited to a sliding time window and bounded
+in size, so no SQL joins are needed to connect the sources.
+"""
+import time
+from collections import OrderedDict, deque
+
+DEFAULT_WINDOW = 48 * 3600      # Seconds an observation stays joinable
+MAX_ASSETS = 10000              # Least recently seen assets are dropped beyond this
+MAX_IOCS = 100000               # IOC -> asset links kept
+MAX_EVENTS_PER_KIND = 64        # Per asset and observation kind
+
+# Observation kinds produced by the OSINT fetchers
+OPEN_PORT = "open_port"
+RISKY_PORT = "risky_port"
+BREACHED_ACCOUNT = "breached_account"
+SUBDOMAIN = "subdomain"
+
+RISKY_PORTS = {21, 23, 445, 1433, 2375, 3306, 3389, 5432, 5900, 6379, 9200, 11211, 27017}
+
+# Composite rules: every kind in "requires" must be seen for the asset within the window
+RULES = [
+    {
+        "name": "Exposed Admin Service with Breached Credentials",
+        "requires": (RISKY_PORT, BREACHED_ACCOUNT),
+        "description": "Database/remote-admin port is internet-facing while account credentials for the same asset are in breach data.",
+        "likelihood": 5,
+        "impact": 5
+    },
+    {
+        "name": "Subdomain Sprawl with Exposed Services",
+        "requires": (SUBDOMAIN, OPEN_PORT),
+        "description": "Subdomains discovered for the asset coincide with exposed services on its hosts.",
+        "likelihood": 4,
+        "impact": 4
+    },
+    {
+        "name": "Compromised Accounts on Expanding Attack Surface",
+        "requires": (BREACHED_ACCOUNT, SUBDOMAIN),
+        "description": "Breached accounts belong to an asset whose attack surface is growing.",
+        "likelihood": 4,
+        "impact": 5
+    }
+]
+
+
+def asset_key(indicator):
+    """
+    Derive the asset an indicator belongs to: the registered domain for
+    emails, domains and subdomains; the indicator itself otherwise (IPs are
+    linked to domains through CorrelationEngine.link).
+    """
+    indicator = indicator.strip().lower()
+    if "@" in indicator:
+        indicator = indicator.rsplit("@", 1)[1]
+    labels = indicator.rstrip(".").split(".")
+    if len(labels) > 2 and not all(label.isdigit() for label in labels):
+        return ".".join(labels[-2:])
+    return indicator
+
+
+class CorrelationEngine:
+    def __init__(self, window=DEFAULT_WINDOW, rules=RULES, max_assets=MAX_ASSETS,
+                 max_iocs=MAX_IOCS, max_events_per_kind=MAX_EVENTS_PER_KIND):
+        self.window = window
+        self.rules = rules
+        self.max_assets = max_assets
+        self.max_iocs = max_iocs
+        self.max_events_per_kind = max_events_per_kind
+        # asset -> {"last_seen": ts, "events": {kind: deque[(ts, source, ioc, detail)]}, "emitted": {rule: ts}}
+        # Ordered by last_seen so idle assets are evicted from the front
+        self.assets = OrderedDict()
+        # ioc -> asset, ordered by last use
+        self.iocs = OrderedDict()
+        self.observed = 0
+        self.emitted = 0
+
+    def link(self, ioc, asset):
+        """Record that an IOC (e.g. an IP from Shodan hostnames) belongs to an asset."""
+        self.iocs[ioc] = asset
+        self.iocs.move_to_end(ioc)
+        while len(self.iocs) > self.max_iocs:
+            self.iocs.popitem(last=False)
+
+    def resolve(self, ioc):
+        """Return the asset an IOC is linked to, falling back to asset_key()."""
+        asset = self.iocs.get(ioc)
+        if asset is not None:
+            self.iocs.move_to_end(ioc)
+            return asset
+        return asset_key(ioc)
+
+    def observe(self, source, kind, ioc, detail=None, asset=None, timestamp=None):
+        """
+        Add one observation and return the composite findings it completes.
+        Each finding is emitted at most once per asset and rule per window.
+        """
+        now = time.time() if timestamp is None else timestamp
+        asset = asset or self.resolve(ioc)
+        self.observed += 1
+
+        state = self.assets.get(asset)
+        if state is None:
+            state = {"last_seen": now, "events": {}, "emitted": {}}
+            self.assets[asset] = state
+        state["last_seen"] = max(state["last_seen"], now)
+        self.assets.move_to_end(asset)
+
+        events = state["events"].get(kind)
+        if events is None:
+            events = state["events"][kind] = deque(maxlen=self.max_events_per_kind)
+        events.append((now, source, ioc, detail))
+
+        cutoff = now - self.window
+        for queue in state["events"].values():
+            while queue and queue[0][0] < cutoff:
+                queue.popleft()
+
+        findings = []
+        for rule in self.rules:
+            if kind not in rule["requires"]:
+                continue
+            if not all(state["events"].get(required) for required in rule["requires"]):
+                continue
+            last_emitted = state["emitted"].get(rule["name"])
+            if last_emitted is not None and last_emitted >= cutoff:
+                continue
+            state["emitted"][rule["name"]] = now
+            findings.append({
+                "asset": asset,
+                "threat_name": rule["name"],
+                "description": rule["description"],
+                "likelihood": rule["likelihood"],
+                "impact": rule["impact"],
+                "timestamp": now,
+                "evidence": {
+                    required: [
+                        {"source": source, "ioc": ioc, "detail": detail}
+                        for _, source, ioc, detail in list(state["events"][required])[-3:]
+                    ]
+                    for required in rule["requires"]
+                }
+            })
+        self.emitted += len(findings)
+        self._evict(cutoff)
+        return findings
+
+    def _evict(self, cutoff):
+        # Assets are ordered by last touch, so idle ones sit at the front
+        while self.assets:
+            asset, state = next(iter(self.assets.items()))
+            if state["last_seen"] >= cutoff and len(self.assets) <= self.max_assets:
+                break
+            self.assets.popitem(last=False)
+
+    def stats(self):
+        return {
+            "observed": self.observed,
+            "findings": self.emitted,
+            "assets": len(self.assets),
+            "iocs": len(self.iocs),
+            "events": sum(len(q) for state in self.assets.values() for q in state["events"].values())
+        }
+
+
+def observe_shodan(engine, ip, shodan_data, timestamp=None):
+    """
+    Feed a Shodan host result. An IP not yet linked to an asset is linked
+    through its reported hostnames; each port becomes an observation.
+    """
+    asset = engine.iocs.get(ip)
+    hostnames = list(shodan_data.get("hostnames") or []) + list(shodan_data.get("domains") or [])
+    if asset is None and hostnames:
+        asset = asset_key(hostnames[0])
+        engine.link(ip, asset)
+    findings = []
+    for port in shodan_data.get("ports") or []:
+        kind = RISKY_PORT if port in RISKY_PORTS else OPEN_PORT
+        findings += engine.observe("shodan", kind, ip, detail=port, asset=asset, timestamp=timestamp)
+        if kind == RISKY_PORT:
+            # A risky port is also an open port for rules that only need exposure
+            findings += engine.observe("shodan", OPEN_PORT, ip, detail=port, asset=asset, timestamp=timestamp)
+    return findings
+
+
+if __name__ == "__main__":
+    import random
+
+    # Throughput check: synthetic ingest spread over many assets on one core
+    engine = CorrelationEngine()
+    domains = [f"shop{i}.example" for i in range(5000)]
+    n = 500000
+    start = time.perf_counter()
+    base = time.time()
+    for i in range(n):
+        domain = random.choice(domains)
+        choice = i % 3
+        if choice == 0:
+            engine.observe("shodan", random.choice((OPEN_PORT, RISKY_PORT)), f"10.0.{i % 256}.{i % 97}",
+                           detail=443, asset=domain, timestamp=base + i * 0.01)
+        elif choice == 1:
+            engine.observe("hibp", BREACHED_ACCOUNT, f"admin@{domain}", detail="Adobe", timestamp=base + i * 0.01)
+        else:
+            engine.observe("securitytrails", SUBDOMAIN, f"api{i % 7}.{domain}", timestamp=base + i * 0.01)
+    elapsed = time.perf_counter() - start
+    print(f"{n} observations in {elapsed:.2f}s ({n / elapsed:,.0f}/s): {engine.stats()}")
@@ -1,6 +1,7 @@
 import openai
 import json
 import time
+from risk_features import extract_features, score_features, risk_band
 
 time.sleep(2)  # Wait 2 seconds between API calls
 
@@ -9,18 +10,57 @@ OPENAI_API_KEY = "sk-proj-ebXNAXD8nYUdSgPzLk79H31Oqa90E3T31fTL2VersoMEhqBajOUqad
 openai.api_key = OPENAI_API_KEY
 
 
-def analyze_risk(shodan_data, virustotal_data, leaklookup_data):
-    #  Truncate inputs to 1500 characters each to prevent long prompts
-    shodan_data_str = json.dumps(shodan_data)[:1500]  # Limit to 1500 characters
-    virustotal_data_str = json.dumps(virustotal_data)[:1500]
-    leaklookup_data_str = json.dumps(leaklookup_data)[:1500]
+CONFIDENCE_THRESHOLD = 0.6  # Local scores below this confidence are escalated to GPT-4
 
+
+def analyze_risk(shodan_data, virustotal_data, leaklookup_data, confidence_threshold=CONFIDENCE_THRESHOLD):
+    """
+    Score the OSINT data locally and only ask GPT-4 when the local scorer is unsure.
+    The result always carries risk_score and explanation, plus the source
+    ("local" or "llm") that produced it. When no provider returned usable
+    data, risk_score is None and insufficient_data is True.
+    """
+    features = extract_features(shodan_data, virustotal_data, leaklookup_data)
+    local = score_features(features)
+    if local["insufficient_data"]:
+        # Every provider failed or returned nothing; GPT-4 would have nothing to go on either
+        return {
+            "risk_score": None,
+            "explanation": local["explanation"],
+            "confidence": 0.0,
+            "source": "local",
+            "insufficient_data": True
+        }
+    if local["confidence"] >= confidence_threshold:
+        return {
+            "risk_score": local["risk_score"],
+            "explanation": local["explanation"],
+            "confidence": local["confidence"],
+            "source": "local"
+        }
+
+    risk_analysis = analyze_risk_llm(features, local)
+    if "error" in risk_analysis:
+        # Fall back to the local estimate rather than returning no score at all
+        return {
+            "risk_score": local["risk_score"],
+            "explanation": local["explanation"],
+            "confidence": local["confidence"],
+            "source": "local",
+            "llm_error": risk_analysis["error"]
+        }
+    risk_analysis["source"] = "llm"
+    return risk_analysis
+
+
+def analyze_risk_llm(features, local=None):
+    """Ask GPT-4 for a risk score using the compact feature set instead of raw JSON."""
+    local = local or score_features(features)
     prompt = f"""
-    Given the following cyber threat intelligence data, analyze the risk level:
+    Given the following cyber threat intelligence features, analyze the risk level:
 
-    Shodan Data: {shodan_data_str}
-    VirusTotal Data: {virustotal_data_str}
-    LeakLookup Data: {leaklookup_data_str}
+    Features: {json.dumps(features, separators=(",", ":"))}
+    Local estimate: {local["risk_score"]} ({local["explanation"]})
 
     Assign a risk score from 0 (low risk) to 100 (high risk).
     Provide a brief explanation in 2-3 sentences.
@@ -59,3 +99,51 @@ def analyze_risk(shodan_data, virustotal_data, leaklookup_data):
     except Exception as e:
         print(f"Error: {e}")
         return {"error": str(e)}
+
+
+def evaluate_tiered_scoring(samples, confidence_threshold=CONFIDENCE_THRESHOLD):
+    """
+    Compare the local scorer with GPT-4 on a list of
+    (shodan_data, virustotal_data, leaklookup_data) samples.
+
+    Every sample is sent to GPT-4 so agreement can be measured; the report
+    shows how often the two land in the same risk band, how many samples
+    the tiered path would escalate, and the latency it saves.
+    """
+    rows = []
+    for shodan_data, virustotal_data, leaklookup_data in samples:
+        start = time.perf_counter()
+        features = extract_features(shodan_data, virustotal_data, leaklookup_data)
+        local = score_features(features)
+        local_latency = time.perf_counter() - start
+        if local["insufficient_data"]:
+            continue
+
+        start = time.perf_counter()
+        llm = analyze_risk_llm(features, local)
+        llm_latency = time.perf_counter() - start
+        if "error" in llm:
+            continue
+
+        rows.append({
+            "agree": risk_band(local["risk_score"]) == risk_band(int(llm["risk_score"])),
+            "escalated": local["confidence"] < confidence_threshold,
+            "local_latency": local_latency,
+            "llm_latency": llm_latency
+        })
+
+    if not rows:
+        return {"samples": 0}
+
+    confident = [row for row in rows if not row["escalated"]]
+    all_llm = sum(row["llm_latency"] for row in rows)
+    tiered = sum(row["local_latency"] + (row["llm_latency"] if row["escalated"] else 0) for row in rows)
+    return {
+        "samples": len(rows),
+        "agreement_rate": sum(row["agree"] for row in rows) / len(rows),
+        "confident_agreement_rate": sum(row["agree"] for row in confident) / len(confident) if confident else None,
+        "escalation_rate": 1 - len(confident) / len(rows),
+        "avg_local_latency_us": sum(row["local_latency"] for row in rows) / len(rows) * 1e6,
+        "avg_llm_latency_ms": all_llm / len(rows) * 1e3,
+        "latency_saved_pct": (1 - tiered / all_llm) * 100 if all_llm else 0.0
+    }
@@ -0,0 +1,221 @@
+"""
+Shared HTTP Client Module
+One pooled requests.Session for every outbound OSINT/LLM call, with strict
+connect/read timeouts, retries with exponential backoff that honour
+Retry-After, and a per-provider circuit breaker that fails fast while a
+provider is down.
+"""
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = (3.05, 15)    # (connect, read) seconds
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5              # Seconds; doubles on every attempt
+BACKOFF_MAX = 30                # Never sleep longer than this between attempts
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+POOL_CONNECTIONS = 20           # Number of hosts with a cached pool
+POOL_MAXSIZE = 10               # Keep-alive connections per host
+FAILURE_THRESHOLD = 5           # Consecutive failures that open a circuit
+RESET_TIMEOUT = 60              # Seconds an open circuit waits before a trial request
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling a provider whose circuit is open."""
+
+
+class CircuitBreaker:
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a request may be sent now."""
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let exactly one trial request through
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Circuit for {self.name} opened after {self.failures} failure(s)")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+def _retry_after(response):
+    """Seconds requested by a Retry-After header (delta-seconds or HTTP date), or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpClient:
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES,
+                 pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        # Retries are handled here so they can respect the circuit breaker
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self.breakers = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, provider):
+        with self._lock:
+            if provider not in self.breakers:
+                self.breakers[provider] = CircuitBreaker(provider)
+            return self.breakers[provider]
+
+    def _record(self, host, latency, failed=False, retried=False):
+        with self._lock:
+            stats = self._stats.setdefault(host, {
+                "requests": 0, "failures": 0, "retries": 0, "latency_total": 0.0, "latency_max": 0.0
+            })
+            stats["requests"] += 1
+            stats["failures"] += failed
+            stats["retries"] += retried
+            stats["latency_total"] += latency
+            stats["latency_max"] = max(stats["latency_max"], latency)
+
+    @staticmethod
+    def _backoff(attempt):
+        # Full jitter keeps parallel workers from retrying in lock-step
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    def request(self, method, url, provider=None, retries=None, timeout=None, **kwargs):
+        """
+        Send a request through the shared session.
+
+        provider names the circuit breaker (defaults to the host). Connection
+        errors, timeouts and 429/5xx responses are retried up to `retries`
+        times; the final 429/5xx response is returned to the caller, while
+        network errors are re-raised (other request errors at once, without
+        retrying). Raises CircuitOpenError without any network traffic while
+        the provider's circuit is open.
+        """
+        host = urlsplit(url).hostname
+        breaker = self.breaker(provider or host)
+        retries = self.max_retries if retries is None else retries
+
+        for attempt in range(retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {breaker.name}, skipping {method} {host}")
+
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=timeout or self.timeout, **kwargs)
+            except requests.exceptions.RequestException as e:
+                # Every error counts against the breaker, or a half-open trial would never resolve
+                self._record(host, time.perf_counter() - start, failed=True, retried=attempt > 0)
+                breaker.record_failure()
+                transient = isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+                if not transient or attempt == retries or breaker.state == "open":
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"{method} {host} failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            failed = response.status_code in RETRY_STATUSES
+            self._record(host, time.perf_counter() - start, failed=failed, retried=attempt > 0)
+            if not failed:
+                breaker.record_success()
+                return response
+
+            breaker.record_failure()
+            delay = _retry_after(response)
+            if delay is None:
+                delay = self._backoff(attempt)
+            if attempt == retries or delay > BACKOFF_MAX or breaker.state == "open":
+                return response
+            logger.warning(f"{method} {host} returned {response.status_code}, retrying in {delay:.1f}s")
+            response.close()
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        """
+        Per-host request counts, latency and connection reuse, plus the
+        state of every provider's circuit breaker.
+        """
+        hosts = {}
+        with self._lock:
+            for host, stats in self._stats.items():
+                hosts[host] = {
+                    "requests": stats["requests"],
+                    "failures": stats["failures"],
+                    "retries": stats["retries"],
+                    "avg_latency_ms": stats["latency_total"] / stats["requests"] * 1000,
+                    "max_latency_ms": stats["latency_max"] * 1000,
+                    "connections_opened": 0,
+                    "connections_reused": 0
+                }
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None or pool.host not in hosts:
+                continue
+            hosts[pool.host]["connections_opened"] += pool.num_connections
+            hosts[pool.host]["connections_reused"] += max(0, pool.num_requests - pool.num_connections)
+        return {
+            "hosts": hosts,
+            "circuits": {name: breaker.state for name, breaker in self.breakers.items()}
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide shared HttpClient."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,156 @@
+"""
+Local Risk Scoring Module
+Turns raw Shodan / VirusTotal / LeakLookup payloads into a compact feature set
+and scores it deterministically, so only ambiguous cases need an LLM call.
+"""
+
+# Ports that should never face the internet for an e-commerce estate
+HIGH_RISK_PORTS = {
+    21: "ftp", 23: "telnet", 135: "msrpc", 139: "netbios", 445: "smb",
+    1433: "mssql", 2375: "docker", 3306: "mysql", 3389: "rdp", 5432: "postgresql",
+    5900: "vnc", 6379: "redis", 9200: "elasticsearch", 11211: "memcached", 27017: "mongodb"
+}
+
+# Product/banner fragments with a history of trivially exploitable versions
+KNOWN_BAD_SERVICES = (
+    "telnet", "vsftpd 2.3.4", "proftpd 1.3.3", "openssh 4.", "openssh 5.",
+    "apache httpd 2.2.", "microsoft iis httpd 6.0", "samba 3.", "exim 4.8", "php/5."
+)
+
+# Risk bands used for agreement checks and confidence estimation
+LOW_RISK_MAX = 30
+HIGH_RISK_MIN = 70
+CONFIDENCE_MARGIN = 15  # Points from a band edge at which a score is considered settled
+
+
+def _is_error(payload):
+    return not payload or (isinstance(payload, dict) and payload.get("error") not in (None, False, "false"))
+
+
+def extract_features(shodan_data, virustotal_data, leaklookup_data):
+    """
+    Reduce the three OSINT payloads to a small, JSON-serialisable feature dict.
+    Missing or error payloads are recorded as absent sources rather than zeros.
+    """
+    features = {
+        "open_ports": [],
+        "risky_ports": [],
+        "known_bad_services": [],
+        "vulns": [],
+        "vt_malicious": 0,
+        "vt_suspicious": 0,
+        "vt_engines": 0,
+        "detection_ratio": 0.0,
+        "breach_count": 0,
+        "breach_sources": [],
+        "sources_present": []
+    }
+
+    if not _is_error(shodan_data) and isinstance(shodan_data, dict):
+        features["sources_present"].append("shodan")
+        ports = set(shodan_data.get("ports") or [])
+        banners = []
+        vulns = set(shodan_data.get("vulns") or [])
+        for service in shodan_data.get("data") or []:
+            if "port" in service:
+                ports.add(service["port"])
+            banner = " ".join(str(service.get(key, "")) for key in ("product", "version")).strip().lower()
+            if banner:
+                banners.append(banner)
+            vulns.update(service.get("vulns") or [])
+        features["open_ports"] = sorted(ports)
+        features["risky_ports"] = [f"{port}/{HIGH_RISK_PORTS[port]}" for port in sorted(ports) if port in HIGH_RISK_PORTS]
+        features["known_bad_services"] = sorted({
+            banner for banner in banners if any(bad in banner for bad in KNOWN_BAD_SERVICES)
+        })
+        features["vulns"] = sorted(vulns)
+
+    if not _is_error(virustotal_data) and isinstance(virustotal_data, dict):
+        # v3 puts the report under data.attributes; search endpoints return data as a list
+        data = virustotal_data.get("data")
+        attributes = data.get("attributes") if isinstance(data, dict) else None
+        stats = attributes.get("last_analysis_stats") if isinstance(attributes, dict) else None
+        if stats:
+            # VirusTotal v3 report
+            malicious = stats.get("malicious", 0)
+            suspicious = stats.get("suspicious", 0)
+            engines = sum(stats.values())
+        else:
+            # VirusTotal v2 report
+            malicious = virustotal_data.get("positives", 0)
+            suspicious = 0
+            engines = virustotal_data.get("total", 0)
+        if engines:
+            features["sources_present"].append("virustotal")
+            features["vt_malicious"] = malicious
+            features["vt_suspicious"] = suspicious
+            features["vt_engines"] = engines
+            features["detection_ratio"] = round(malicious / engines, 4)
+
+    if not _is_error(leaklookup_data):
+        # LeakLookup wraps results in "message"; a response without it reports no breaches
+        breaches = leaklookup_data.get("message") if isinstance(leaklookup_data, dict) else leaklookup_data
+        if isinstance(breaches, dict):
+            sources = sorted(breaches)
+        elif isinstance(breaches, list):
+            sources = sorted({b.get("Name", str(b)) if isinstance(b, dict) else str(b) for b in breaches})
+        else:
+            sources = []
+        features["sources_present"].append("leaklookup")
+        features["breach_count"] = len(sources)
+        features["breach_sources"] = sources[:10]
+
+    return features
+
+
+def risk_band(score):
+    """Map a 0-100 score to the low / medium / high band."""
+    if score < LOW_RISK_MAX:
+        return "low"
+    if score < HIGH_RISK_MIN:
+        return "medium"
+    return "high"
+
+
+def score_features(features):
+    """
+    Score a feature dict from 0 to 100.
+
+    Returns a dict with risk_score, band, confidence (0-1), insufficient_data
+    and a short explanation. Confidence drops near a band edge and when
+    sources are missing; callers escalate low-confidence cases to the LLM.
+    With no usable source at all the score means nothing: band is "unknown",
+    confidence 0 and insufficient_data True, and the caller decides what to do.
+    """
+    if not features["sources_present"]:
+        return {
+            "risk_score": 0,
+            "band": "unknown",
+            "confidence": 0.0,
+            "insufficient_data": True,
+            "explanation": "No OSINT data available for this target."
+        }
+
+    components = {
+        "exposure": min(10, 2 * len(features["open_ports"])),
+        "risky ports": min(24, 8 * len(features["risky_ports"])),
+        "outdated services": min(20, 10 * len(features["known_bad_services"])),
+        "known CVEs": min(25, 5 * len(features["vulns"])),
+        "malware detections": min(35, round(350 * features["detection_ratio"]) + 2 * features["vt_suspicious"]),
+        "breaches": min(20, 4 * features["breach_count"])
+    }
+    score = min(100, sum(components.values()))
+
+    distance = min(abs(score - LOW_RISK_MAX), abs(score - HIGH_RISK_MIN))
+    coverage = len(features["sources_present"]) / 3
+    confidence = round(min(1.0, distance / CONFIDENCE_MARGIN) * (0.5 + 0.5 * coverage), 3)
+
+    drivers = [f"{name} (+{points})" for name, points in sorted(components.items(), key=lambda c: -c[1]) if points]
+    explanation = f"Local score driven by {', '.join(drivers[:3])}." if drivers else "No risk indicators found."
+    return {
+        "risk_score": score,
+        "band": risk_band(score),
+        "confidence": confidence,
+        "insufficient_data": False,
+        "explanation": explanation
+    }
@@ -0,0 +1,378 @@
+"""
+Threat Event Archive Module
+Append-only columnar history of threat events for long-range analysis.
+
+Events are stored as one raw NumPy column file per field inside a daily
+partition directory, and memory-mapped on read, so range scans, histograms
+and group-bys run over the columns directly instead of deserializing rows.
+Strings (threat names, details) are dictionary-encoded into integer codes.
+The archive assumes a single writer process; any number of readers is fine.
+"""
+import os
+import json
+import logging
+import ipaddress
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Column name -> on-disk dtype (little endian, fixed width)
+COLUMNS = {
+    "timestamp": "<i8",     # Microseconds since the Unix epoch (UTC)
+    "source": "<u1",        # Index into SOURCES
+    "asset_id": "<i4",      # -1 when unknown
+    "ip": "<u4",            # IPv4 address as an integer, 0 when unknown
+    "threat": "<i4",        # Dictionary code
+    "detail": "<i4",        # Dictionary code
+    "likelihood": "<i1",
+    "impact": "<i1",
+    "risk_score": "<i2"
+}
+STRING_COLUMNS = ("threat", "detail")
+SOURCES = ("threat_data", "tva_mapping")
+
+MICROS_PER_DAY = 86_400_000_000
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+# Table -> (SELECT for export, INSERT for import)
+SQL_QUERIES = {
+    "threat_data": (
+        "SELECT ip_address, ports, services, created_at FROM threat_data "
+        "WHERE created_at >= %s ORDER BY created_at",
+        "INSERT INTO threat_data (ip_address, ports, services, created_at) VALUES (%s, %s, %s, %s)"
+    ),
+    "tva_mapping": (
+        "SELECT asset_id, threat_name, vulnerability_description, likelihood, impact, timestamp "
+        "FROM tva_mapping WHERE timestamp >= %s ORDER BY timestamp",
+        "INSERT INTO tva_mapping (asset_id, threat_name, vulnerability_description, likelihood, impact, timestamp) "
+        "VALUES (%s, %s, %s, %s, %s, %s)"
+    )
+}
+
+
+def to_micros(value):
+    """Convert a datetime (naive = UTC) or epoch seconds to epoch microseconds."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return (value - EPOCH) // ONE_MICROSECOND
+    return int(value * 1_000_000)
+
+
+def from_micros(micros):
+    """Convert epoch microseconds back to a naive UTC datetime."""
+    return EPOCH + int(micros) * ONE_MICROSECOND
+
+
+def _ip_to_int(value):
+    try:
+        return int(ipaddress.IPv4Address(value))
+    except (ValueError, TypeError):
+        return 0
+
+
+class ThreatArchive:
+    def __init__(self, root="data/threat_archive"):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+        self._dictionary_path = os.path.join(self.root, "dictionary.jsonl")
+        self._strings = []
+        self._codes = {}
+        self._load_dictionary()
+
+    def _load_dictionary(self):
+        """Load the append-only string dictionary (line number = code)."""
+        if not os.path.exists(self._dictionary_path):
+            return
+        with open(self._dictionary_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # Torn write from a crash; the string was never referenced
+                value = json.loads(line)
+                self._codes[value] = len(self._strings)
+                self._strings.append(value)
+
+    def encode(self, values):
+        """Map strings to dictionary codes, appending unseen strings. None -> -1."""
+        codes = np.empty(len(values), dtype=COLUMNS["threat"])
+        new = []
+        for i, value in enumerate(values):
+            if value is None:
+                codes[i] = -1
+                continue
+            value = str(value)
+            code = self._codes.get(value)
+            if code is None:
+                code = len(self._strings)
+                self._codes[value] = code
+                self._strings.append(value)
+                new.append(value)
+            codes[i] = code
+        if new:
+            with open(self._dictionary_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(value) + "\n" for value in new))
+        return codes
+
+    def decode(self, codes):
+        """Map dictionary codes back to strings."""
+        return [self._strings[code] if code >= 0 else None for code in codes]
+
+    # ---- Partitions ----------------------------------------------------
+
+    def _partition_dir(self, day):
+        return os.path.join(self.root, from_micros(day * MICROS_PER_DAY).strftime("%Y-%m-%d"))
+
+    def partitions(self, start=None, end=None):
+        """Partition days (days since epoch) overlapping [start, end)."""
+        days = []
+        for name in sorted(os.listdir(self.root)):
+            try:
+                day = to_micros(datetime.strptime(name, "%Y-%m-%d")) // MICROS_PER_DAY
+            except ValueError:
+                continue
+            if start is not None and (day + 1) * MICROS_PER_DAY <= to_micros(start):
+                continue
+            if end is not None and day * MICROS_PER_DAY >= to_micros(end):
+                continue
+            days.append(day)
+        return days
+
+    def _row_count(self, path):
+        # The shortest column wins, so a batch torn by a crash is never visible
+        counts = []
+        for name, dtype in COLUMNS.items():
+            column_path = os.path.join(path, f"{name}.bin")
+            size = os.path.getsize(column_path) if os.path.exists(column_path) else 0
+            counts.append(size // np.dtype(dtype).itemsize)
+        return min(counts)
+
+    def _read_meta(self, path):
+        try:
+            with open(os.path.join(path, "_meta.json"), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"sorted": True}
+
+    def _write_meta(self, path, meta):
+        tmp_path = os.path.join(path, "_meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(path, "_meta.json"))
+
+    def _open_column(self, path, name, rows):
+        if rows == 0:
+            return np.empty(0, dtype=COLUMNS[name])
+        return np.memmap(os.path.join(path, f"{name}.bin"), dtype=COLUMNS[name], mode="r", shape=(rows,))
+
+    # ---- Writing -------------------------------------------------------
+
+    def append(self, batch):
+        """
+        Append a columnar batch: a dict of column name -> sequence.
+        Missing numeric columns default to -1/0; string columns are encoded.
+        Returns the number of rows written.
+        """
+        rows = len(batch["timestamp"])
+        if rows == 0:
+            return 0
+
+        columns = {}
+        for name, dtype in COLUMNS.items():
+            if name in STRING_COLUMNS:
+                values = batch.get(name)
+                columns[name] = self.encode(values) if values is not None else np.full(rows, -1, dtype=dtype)
+            elif name in batch:
+                columns[name] = np.asarray(batch[name], dtype=dtype)
+            else:
+                columns[name] = np.full(rows, -1 if name == "asset_id" else 0, dtype=dtype)
+
+        order = np.argsort(columns["timestamp"], kind="stable")
+        columns = {name: values[order] for name, values in columns.items()}
+        days = columns["timestamp"] // MICROS_PER_DAY
+        boundaries = np.flatnonzero(np.diff(days)) + 1
+
+        for lo, hi in zip(np.r_[0, boundaries], np.r_[boundaries, rows]):
+            path = self._partition_dir(int(days[lo]))
+            os.makedirs(path, exist_ok=True)
+            existing = self._row_count(path)
+            meta = self._read_meta(path)
+            if existing and meta["sorted"]:
+                last = self._open_column(path, "timestamp", existing)[-1]
+                meta["sorted"] = bool(columns["timestamp"][lo] >= last)
+            for name, values in columns.items():
+                with open(os.path.join(path, f"{name}.bin"), "r+b" if existing else "wb") as f:
+                    # Truncate any torn tail before appending
+                    f.truncate(existing * values.itemsize)
+                    f.seek(0, os.SEEK_END)
+                    values[lo:hi].tofile(f)
+            self._write_meta(path, meta)
+        return rows
+
+    def append_rows(self, rows):
+        """Append a list of event dicts (convenience wrapper around append)."""
+        if not rows:
+            return 0
+        batch = {name: [row.get(name) for row in rows] for name in COLUMNS}
+        batch["timestamp"] = [to_micros(row["timestamp"]) for row in rows]
+        for name in ("asset_id", "likelihood", "impact", "risk_score"):
+            default = -1 if name == "asset_id" else 0
+            batch[name] = [default if value is None else value for value in batch[name]]
+        batch["ip"] = [_ip_to_int(value) if isinstance(value, str) else (value or 0) for value in batch["ip"]]
+        batch["source"] = [SOURCES.index(value) if isinstance(value, str) else (value or 0) for value in batch["source"]]
+        return self.append(batch)
+
+    # ---- Reading -------------------------------------------------------
+
+    def scan(self, start=None, end=None, columns=None):
+        """
+        Yield one dict of column arrays per partition for events in [start, end).
+        Arrays are read-only memory-mapped views (no copy) when the partition
+        is time-sorted; unsorted partitions are filtered with a mask.
+        """
+        columns = list(columns or COLUMNS)
+        lo_ts, hi_ts = to_micros(start), to_micros(end)
+        for day in self.partitions(start, end):
+            path = self._partition_dir(day)
+            rows = self._row_count(path)
+            if rows == 0:
+                continue
+            timestamps = self._open_column(path, "timestamp", rows)
+            if self._read_meta(path)["sorted"]:
+                lo = 0 if lo_ts is None else int(np.searchsorted(timestamps, lo_ts, "left"))
+                hi = rows if hi_ts is None else int(np.searchsorted(timestamps, hi_ts, "left"))
+                if lo >= hi:
+                    continue
+                yield {name: self._open_column(path, name, rows)[lo:hi] for name in columns}
+            else:
+                mask = np.ones(rows, dtype=bool)
+                if lo_ts is not None:
+                    mask &= timestamps >= lo_ts
+                if hi_ts is not None:
+                    mask &= timestamps < hi_ts
+                if not mask.any():
+                    continue
+                yield {name: self._open_column(path, name, rows)[mask] for name in columns}
+
+    def count(self, start=None, end=None):
+        """Number of events in [start, end)."""
+        return sum(len(part["timestamp"]) for part in self.scan(start, end, ["timestamp"]))
+
+    def risk_histogram(self, start=None, end=None, max_score=100):
+        """Event count per risk score (index = score) over [start, end)."""
+        histogram = np.zeros(max_score + 1, dtype=np.int64)
+        for part in self.scan(start, end, ["risk_score"]):
+            scores = np.clip(part["risk_score"], 0, max_score)
+            histogram += np.bincount(scores, minlength=max_score + 1)
+        return histogram
+
+    def group_by(self, key, start=None, end=None, value="risk_score"):
+        """
+        Aggregate a numeric column by key over [start, end) without
+        materialising rows. Returns {key: {"count", "sum", "mean", "max"}};
+        dictionary-encoded keys are decoded back to strings.
+        """
+        totals = {}
+        for part in self.scan(start, end, [key, value]):
+            keys, inverse = np.unique(part[key], return_inverse=True)
+            values = part[value].astype(np.int64)
+            counts = np.bincount(inverse, minlength=len(keys))
+            sums = np.bincount(inverse, weights=values, minlength=len(keys))
+            maxes = np.full(len(keys), np.iinfo(np.int64).min)
+            np.maximum.at(maxes, inverse, values)
+            for k, c, s, m in zip(keys.tolist(), counts.tolist(), sums.tolist(), maxes.tolist()):
+                entry = totals.setdefault(k, {"count": 0, "sum": 0, "max": m})
+                entry["count"] += c
+                entry["sum"] += int(s)
+                entry["max"] = max(entry["max"], m)
+
+        result = {}
+        for k, entry in totals.items():
+            label = self.decode([k])[0] if key in STRING_COLUMNS else k
+            entry["mean"] = entry["sum"] / entry["count"]
+            result[label] = entry
+        return result
+
+    def to_dataframe(self, start=None, end=None, columns=None):
+        """
+        Load [start, end) into a pandas DataFrame. A range inside one sorted
+        partition is handed over without copying; wider ranges concatenate.
+        """
+        parts = list(self.scan(start, end, columns))
+        names = list(columns or COLUMNS)
+        if not parts:
+            return pd.DataFrame({name: np.empty(0, dtype=COLUMNS[name]) for name in names})
+        if len(parts) == 1:
+            return pd.DataFrame(parts[0], copy=False)
+        return pd.DataFrame({name: np.concatenate([part[name] for part in parts]) for name in names}, copy=False)
+
+    # ---- SQL export / import -------------------------------------------
+
+    def export_from_sql(self, conn, table, since=None, batch_size=10000):
+        """
+        Copy rows of threat_data or tva_mapping created at or after `since`
+        into the archive, fetching and appending batch_size rows at a time.
+        """
+        select_query = SQL_QUERIES[table][0]
+        source = SOURCES.index(table)
+        cursor = conn.cursor()
+        cursor.execute(select_query, (since or EPOCH,))
+        total = 0
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            if table == "threat_data":
+                batch = {
+                    "timestamp": [to_micros(row[3]) for row in rows],
+                    "ip": [_ip_to_int(row[0]) for row in rows],
+                    "detail": [row[1] for row in rows],
+                    "threat": [row[2] for row in rows]
+                }
+            else:
+                batch = {
+                    "timestamp": [to_micros(row[5]) for row in rows],
+                    "asset_id": [-1 if row[0] is None else row[0] for row in rows],
+                    "threat": [row[1] for row in rows],
+                    "detail": [row[2] for row in rows],
+                    "likelihood": [row[3] or 0 for row in rows],
+                    "impact": [row[4] or 0 for row in rows],
+                    "risk_score": [(row[3] or 0) * (row[4] or 0) for row in rows]
+                }
+            batch["source"] = np.full(len(rows), source)
+            total += self.append(batch)
+        cursor.close()
+        logger.info(f"Archived {total} rows from {table}")
+        return total
+
+    def import_into_sql(self, conn, table, start=None, end=None, batch_size=10000):
+        """Write archived events of one table back into SQL with batched executemany."""
+        insert_query = SQL_QUERIES[table][1]
+        source = SOURCES.index(table)
+        cursor = conn.cursor()
+        total = 0
+        for part in self.scan(start, end):
+            selected = np.flatnonzero(part["source"] == source)
+            for lo in range(0, len(selected), batch_size):
+                idx = selected[lo:lo + batch_size]
+                timestamps = [from_micros(ts) for ts in part["timestamp"][idx]]
+                threats = self.decode(part["threat"][idx])
+                details = self.decode(part["detail"][idx])
+                if table == "threat_data":
+                    ips = [str(ipaddress.IPv4Address(int(ip))) if ip else None for ip in part["ip"][idx]]
+                    rows = list(zip(ips, details, threats, timestamps))
+                else:
+                    asset_ids = [None if a < 0 else a for a in part["asset_id"][idx].tolist()]
+                    rows = list(zip(asset_ids, threats, details,
+                                    part["likelihood"][idx].tolist(), part["impact"][idx].tolist(), timestamps))
+                cursor.executemany(insert_query, rows)
+                conn.commit()
+                total += len(rows)
+        cursor.close()
+        logger.info(f"Restored {total} rows into {table}")
+        return total
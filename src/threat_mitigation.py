@@ -6,6 +6,7 @@ import os
 import json
 import logging
 from datetime import datetime
+from action_journal import open_journal
 
 # Configure logging
 logging.basicConfig(
@@ -18,7 +19,12 @@ logger = logging.getLogger(__name__)
 class ThreatMitigation:
     def __init__(self, config_file="config/mitigation_config.json"):
         self.config = self._load_config(config_file)
-        self.remediation_history = []
+        self.journal = open_journal(
+            self.config.get("remediation_journal_dir", "logs/remediation_history"),
+            index_fields=("threat_type", "target")
+        )
+        # Bounded ring of recent remediations; the full history lives in the journal
+        self.remediation_history = self.journal.ring
         
     def _load_config(self, config_file):
         """Load configuration from file."""
@@ -71,17 +77,36 @@ class ThreatMitigation:
         record = {
             "timestamp": datetime.now().isoformat(),
             "threat_type": threat_type,
+            "target": self._remediation_target(threat_details),
             "details": threat_details,
             "action": action
         }
         
-        self.remediation_history.append(record)
-        
-        # Also save to file
-        with open("logs/remediation_history.json", "a") as f:
-            f.write(json.dumps(record) + "\n")
+        # Buffered append to the journal, which also keeps the in-memory ring
+        self.journal.append(record)
         
         logger.info(f"Recorded remediation action for {threat_type}")
+    
+    def _remediation_target(self, threat_details):
+        """Extract the IP/host a remediation applies to so it can be looked up later."""
+        if isinstance(threat_details, dict):
+            for key in ("ip", "source_ip", "target", "host"):
+                if threat_details.get(key):
+                    return str(threat_details[key])
+        return None
+    
+    def find_remediations(self, threat_type=None, target=None, since=None, until=None, limit=None):
+        """
+        Look up recorded remediations by threat type and/or target within a time range,
+        e.g. find_remediations(target="1.2.3.4", since=datetime.now() - timedelta(days=7)).
+        """
+        filters = {"threat_type": threat_type, "target": target}
+        filters = {field: value for field, value in filters.items() if value is not None}
+        return self.journal.query(since=since, until=until, limit=limit, **filters)
+    
+    def close(self):
+        """Flush pending remediations and release this instance's hold on the journal."""
+        self.journal.close()
 
 # Example usage
 if __name__ == "__main__":